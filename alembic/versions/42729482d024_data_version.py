@@ -0,0 +1,44 @@
+"""Data version
+
+Revision ID: 42729482d024
+Revises: bd8d1afd4fda
+Create Date: 2026-10-18 10:12:31.406118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '42729482d024'
+down_revision = 'bd8d1afd4fda'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('charityproject', 'donation')
+OPERATIONS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def upgrade() -> None:
+    op.create_table('dataversion',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('INSERT INTO dataversion (id, version) VALUES (1, 0)')
+    for table in VERSIONED_TABLES:
+        for operation in OPERATIONS:
+            op.execute(
+                f'CREATE TRIGGER {table}_{operation}_data_version '
+                f'AFTER {operation} ON {table} '
+                'BEGIN '
+                'UPDATE dataversion SET version = version + 1 WHERE id = 1; '
+                'END'
+            )
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        for operation in OPERATIONS:
+            op.execute(f'DROP TRIGGER {table}_{operation}_data_version')
+    op.drop_table('dataversion')
@@ -0,0 +1,53 @@
+"""Charity project search
+
+Revision ID: b5a1e9c3d724
+Revises: 6b2f8d4a0c93
+Create Date: 2026-10-18 19:16:52.774310
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5a1e9c3d724'
+down_revision = '6b2f8d4a0c93'
+branch_labels = None
+depends_on = None
+
+INSERT = (
+    'INSERT INTO charityproject_fts (rowid, name, description) '
+    'VALUES (NEW.id, NEW.name, NEW.description); '
+)
+DELETE = (
+    'INSERT INTO charityproject_fts '
+    '(charityproject_fts, rowid, name, description) '
+    "VALUES ('delete', OLD.id, OLD.name, OLD.description); "
+)
+TRIGGERS = {
+    'INSERT': INSERT,
+    'UPDATE OF name, description': DELETE + INSERT,
+    'DELETE': DELETE,
+}
+
+
+def upgrade() -> None:
+    op.execute(
+        'CREATE VIRTUAL TABLE charityproject_fts '
+        'USING fts5(name, description, '
+        "content='charityproject', content_rowid='id')"
+    )
+    op.execute(
+        "INSERT INTO charityproject_fts (charityproject_fts) VALUES ('rebuild')"
+    )
+    for operation, statements in TRIGGERS.items():
+        op.execute(
+            f'CREATE TRIGGER charityproject_{operation.split()[0]}_fts '
+            f'AFTER {operation} ON charityproject '
+            f'BEGIN {statements}END'
+        )
+
+
+def downgrade() -> None:
+    for operation in TRIGGERS:
+        op.execute(f'DROP TRIGGER charityproject_{operation.split()[0]}_fts')
+    op.execute('DROP TABLE charityproject_fts')
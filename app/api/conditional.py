@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import Request, Response
+
+CACHE_CONTROL = 'no-cache'
+
+
+def make_etag(version: int) -> str:
+    return f'W/"{version}"'
+
+
+def get_last_modified(updated_at: Optional[datetime]) -> Optional[str]:
+    if updated_at is None:
+        return None
+    return format_datetime(updated_at.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def strip_weakness(etag: str) -> str:
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def is_not_modified(
+    request: Request,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None
+) -> bool:
+    """Evaluate the conditional headers of the request.
+        If-Modified-Since is only taken into account
+        when there is no ETag to compare.
+        The dates have a resolution of one second,
+        so a change within the second of the header date
+        is a modification as well.
+    """
+    if_none_match = request.headers.get('if-none-match')
+    if etag is not None or if_none_match is not None:
+        if etag is None or if_none_match is None:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or strip_weakness(etag) in map(strip_weakness, tags)
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) < parsedate_to_datetime(
+            if_modified_since
+        )
+    except (TypeError, ValueError):
+        return False
+
+
+def set_validators(
+    response: Response,
+    etag: str,
+    last_modified: Optional[str] = None
+) -> None:
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    if last_modified is not None:
+        response.headers['Last-Modified'] = last_modified
+
+
+def not_modified(etag: str, last_modified: Optional[str] = None) -> Response:
+    response = Response(status_code=HTTPStatus.NOT_MODIFIED)
+    set_validators(response, etag, last_modified)
+    return response
@@ -1,3 +1,5 @@
 from .charity_project import router as charityproject_router  # noqa
 from .donation import router as donation_router  # noqa
+from .export import router as export_router  # noqa
+from .fund_stats import router as fund_stats_router  # noqa
 from .user import router as user_router  # noqa
\ No newline at end of file
@@ -1,22 +1,35 @@
-from typing import List
+from http import HTTPStatus
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.conditional import (get_last_modified, is_not_modified,
+                                 make_etag, not_modified, set_validators)
+from app.api.fields import Fieldset, FieldsetQuery
+from app.api.pagination import Page, SearchPage
 from app.api.validators import (check_charity_project_exists,
                                 check_correct_full_amount_for_update,
                                 check_name_duplicate, check_project_was_closed,
                                 check_project_was_invested)
-from app.core.db import get_async_session
+from app.core.config import settings
+from app.core.db import begin_write, get_async_session, get_read_session
 from app.core.user import current_superuser
 from app.crud.charity_project import charityproject_crud
+from app.crud.data_version import data_version_crud
+from app.crud.investment import investment_crud
 from app.schemas.charity_project import (CharityProjectCreate,
                                          CharityProjectDB,
                                          CharityProjectUpdate)
-from app.services.investment import execute_investment_process
+from app.schemas.allocation import AllocationStatus
+from app.schemas.investment import InvestmentDB
+from app.services.deferred_worker import deferred_worker
+from app.services.investment import execute_create_investment_process
 
 router = APIRouter()
 
+charity_project_fields = FieldsetQuery(CharityProjectDB, exclude_none=True)
+
 
 @router.get(
     '/',
@@ -24,13 +37,33 @@ router = APIRouter()
     response_model_exclude_none=True
 )
 async def get_all_charity_projects(
-    session: AsyncSession = Depends(get_async_session)
+    request: Request,
+    response: Response,
+    fully_invested: Optional[bool] = None,
+    page: Page = Depends(),
+    fieldset: Fieldset = Depends(charity_project_fields),
+    session: AsyncSession = Depends(get_read_session)
 ):
     """Get all the charity projects.
         Endpoint is available for all users.
+        Pass the limit to get a page, the cursor of the next one
+        comes in the X-Next-Cursor header.
+        Pass the fields to get only them.
+        The ETag is the data version, so a conditional request
+        is answered with 304 without reading the projects.
     """
-    charity_projects = await charityproject_crud.get_multiple(session)
-    return charity_projects
+    data_version = await data_version_crud.get_data_version(session)
+    etag = make_etag(data_version.version)
+    last_modified = get_last_modified(data_version.updated_at)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+    charity_projects = await charityproject_crud.get_rows(
+        session, fieldset.columns, page.limit, page.after, fully_invested
+    )
+    await session.close()
+    page.set_next_cursor(response, charity_projects)
+    return fieldset.render(charity_projects, response)
 
 
 @router.post(
@@ -41,22 +74,82 @@ async def get_all_charity_projects(
 )
 async def create_new_charity_project(
     charity_project: CharityProjectCreate,
+    response: Response,
     session: AsyncSession = Depends(get_async_session),
 ):
     """Create new Charity Project.
         Endpoint is available only for superusers.
+        In the deferred allocation mode the project is only saved
+        and 202 is returned, see its status endpoint.
     """
+    await begin_write(session)
     await check_name_duplicate(
         charity_project.name, session
     )
-    new_charity_project = await charityproject_crud.create(
-        charity_project, session
+    if settings.allocation_mode == 'deferred':
+        response.status_code = HTTPStatus.ACCEPTED
+        return await deferred_worker.defer(
+            charity_project, charityproject_crud, session
+        )
+    return await execute_create_investment_process(
+        charity_project, charityproject_crud, session
     )
-    await execute_investment_process(
-        new_charity_project, session
+
+
+@router.get(
+    '/search',
+    response_model=List[CharityProjectDB],
+    response_model_exclude_none=True
+)
+async def search_charity_projects(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=255),
+    page: SearchPage = Depends(),
+    fieldset: Fieldset = Depends(charity_project_fields),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """Search the charity projects by the words of the name and description.
+        Endpoint is available for all users.
+        The most relevant projects come first.
+        Pass the limit to get a page, the cursor of the next one
+        comes in the X-Next-Cursor header.
+    """
+    charity_projects = await charityproject_crud.search(
+        session, q, fieldset.columns, page.limit, page.after
     )
-    await session.refresh(new_charity_project)
-    return new_charity_project
+    await session.close()
+    page.set_next_cursor(response, charity_projects)
+    return fieldset.render(charity_projects, response)
+
+
+@router.get(
+    '/{project_id}',
+    response_model=CharityProjectDB,
+    response_model_exclude_none=True
+)
+async def get_charity_project(
+    project_id: int,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session)
+):
+    """Get the Charity Project.
+        Endpoint is available for all users.
+        The ETag is the row version of the project.
+    """
+    project_version = await charityproject_crud.get_charity_project_version(
+        project_id, session
+    )
+    if project_version is not None:
+        etag = make_etag(project_version)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+    charity_project = await check_charity_project_exists(
+        project_id, session
+    )
+    await session.close()
+    set_validators(response, make_etag(charity_project.version))
+    return charity_project
 
 
 @router.patch(
@@ -76,6 +169,7 @@ async def partially_update_charity_project(
             - description;
             - full_amount (could not be less than the invested amount).
     """
+    await begin_write(session)
     is_charity_project = await check_charity_project_exists(
         project_id, session
     )
@@ -110,6 +204,7 @@ async def delete_charity_project(
         The invested project could only be closed but not deleted.
         Not invested projects could be deleted.
     """
+    await begin_write(session)
     charity_project = await check_charity_project_exists(
         project_id, session
     )
@@ -120,3 +215,39 @@ async def delete_charity_project(
         )
     )
     return charity_project
+
+
+@router.get(
+    '/{project_id}/investments',
+    response_model=List[InvestmentDB],
+    dependencies=[Depends(current_superuser)]
+)
+async def get_charity_project_investments(
+    project_id: int,
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Get the donations the Charity Project was funded with.
+        Endpoint is available only for superusers.
+    """
+    await check_charity_project_exists(project_id, session)
+    investments = await investment_crud.get_investments_by_project(
+        project_id, session
+    )
+    await session.close()
+    return investments
+
+
+@router.get(
+    '/{project_id}/status',
+    response_model=AllocationStatus
+)
+async def get_charity_project_status(
+    project_id: int,
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Get the allocation status of the Charity Project.
+        Endpoint is available for all users.
+    """
+    charity_project = await check_charity_project_exists(project_id, session)
+    await session.close()
+    return charity_project
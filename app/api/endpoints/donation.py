@@ -1,14 +1,27 @@
-from typing import List
+from http import HTTPStatus
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_async_session
+from app.api.fields import Fieldset, FieldsetQuery
+from app.api.pagination import Page
+from app.api.validators import check_donation_exists
+from app.core.config import settings
+from app.core.db import get_async_session, get_read_session
 from app.core.user import current_superuser, current_user
 from app.crud.donation import donation_crud
+from app.crud.donation_summary import donation_summary_crud
+from app.crud.investment import investment_crud
 from app.models import User
-from app.schemas.donation import DonationCreate, DonationDB
-from app.services.investment import execute_investment_process
+from app.schemas.allocation import AllocationStatus
+from app.schemas.donation import (DonationBulkCreate, DonationCreate,
+                                  DonationDB, DonationSummaryDB)
+from app.schemas.investment import InvestmentDB
+from app.services.allocation_worker import allocation_worker
+from app.services.deferred_worker import deferred_worker
+from app.services.investment import (execute_bulk_investment_process,
+                                     execute_create_investment_process)
 
 EXCLUDE_FIELDS = (
     'user_id',
@@ -19,6 +32,9 @@ EXCLUDE_FIELDS = (
 
 router = APIRouter()
 
+donation_fields = FieldsetQuery(DonationDB, exclude_none=True)
+my_donation_fields = FieldsetQuery(DonationDB, exclude=EXCLUDE_FIELDS)
+
 
 @router.get(
     '/',
@@ -27,13 +43,24 @@ router = APIRouter()
     response_model_exclude_none=True
 )
 async def get_all_donations_superuser(
-    session: AsyncSession = Depends(get_async_session),
+    response: Response,
+    fully_invested: Optional[bool] = None,
+    page: Page = Depends(),
+    fieldset: Fieldset = Depends(donation_fields),
+    session: AsyncSession = Depends(get_read_session),
 ):
     """Get all the donations.
         This endpoint is available only for superuser.
+        Pass the limit to get a page, the cursor of the next one
+        comes in the X-Next-Cursor header.
+        Pass the fields to get only them.
     """
-    donations = await donation_crud.get_multiple(session)
-    return donations
+    donations = await donation_crud.get_rows(
+        session, fieldset.columns, page.limit, page.after, fully_invested
+    )
+    await session.close()
+    page.set_next_cursor(response, donations)
+    return fieldset.render(donations, response)
 
 
 @router.get(
@@ -42,14 +69,87 @@ async def get_all_donations_superuser(
     response_model_exclude={*EXCLUDE_FIELDS}
 )
 async def get_my_donations(
-    session: AsyncSession = Depends(get_async_session),
+    response: Response,
+    fully_invested: Optional[bool] = None,
+    page: Page = Depends(),
+    fieldset: Fieldset = Depends(my_donation_fields),
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_user),
+):
+    """Get all the donations for the current user.
+        Pass the limit to get a page, the cursor of the next one
+        comes in the X-Next-Cursor header.
+        Pass the fields to get only them.
+    """
+    donations = await donation_crud.get_rows(
+        session,
+        fieldset.columns,
+        page.limit,
+        page.after,
+        fully_invested,
+        user_id=user.id
+    )
+    await session.close()
+    page.set_next_cursor(response, donations)
+    return fieldset.render(donations, response)
+
+
+@router.get(
+    '/my/summary',
+    response_model=DonationSummaryDB
+)
+async def get_my_donation_summary(
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_user),
+):
+    """Get the totals of the donations of the current user.
+        The totals are kept up to date by the database,
+        so the history is not read.
+    """
+    summary = await donation_summary_crud.get_summary_by_user(
+        user.id, session
+    )
+    await session.close()
+    if summary is None:
+        return DonationSummaryDB()
+    return DonationSummaryDB(**summary._mapping)
+
+
+@router.get(
+    '/{donation_id}/investments',
+    response_model=List[InvestmentDB]
+)
+async def get_donation_investments(
+    donation_id: int,
+    session: AsyncSession = Depends(get_read_session),
     user: User = Depends(current_user),
 ):
-    """Get all the donations for the current user."""
-    donations = await donation_crud.get_donations_by_user(
-        session=session, user=user
+    """Get the projects the donation was invested in.
+        Endpoint is available for the donation owner and superusers.
+    """
+    await check_donation_exists(donation_id, session, user)
+    investments = await investment_crud.get_investments_by_donation(
+        donation_id, session
     )
-    return donations
+    await session.close()
+    return investments
+
+
+@router.get(
+    '/{donation_id}/status',
+    response_model=AllocationStatus
+)
+async def get_donation_status(
+    donation_id: int,
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_user),
+):
+    """Get the allocation status of the donation.
+        Endpoint is available for the donation owner and superusers.
+    """
+    donation = await check_donation_exists(donation_id, session, user)
+    await session.close()
+    return donation
 
 
 @router.post(
@@ -60,15 +160,43 @@ async def get_my_donations(
 )
 async def create_new_donation(
     donation: DonationCreate,
+    response: Response,
     session: AsyncSession = Depends(get_async_session),
     user: User = Depends(current_user)
 ):
     """Create New Donation.
         Endpoint is available for registered and super users.
+        In the deferred allocation mode the donation is only saved
+        and 202 is returned, see its status endpoint.
+    """
+    if settings.allocation_mode == 'deferred':
+        response.status_code = HTTPStatus.ACCEPTED
+        return await deferred_worker.defer(
+            donation, donation_crud, session, user
+        )
+    if settings.allocation_mode == 'batched':
+        return await allocation_worker.submit(
+            donation_crud.build(donation, user)
+        )
+    return await execute_create_investment_process(
+        donation, donation_crud, session, user
+    )
+
+
+@router.post(
+    '/bulk',
+    response_model=List[DonationDB],
+    response_model_exclude_none=True
+)
+async def create_donations_bulk(
+    donations: DonationBulkCreate,
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_superuser)
+):
+    """Create a batch of donations.
+        The donations are inserted and invested at once.
+        Endpoint is available only for superusers.
     """
-    new_donation = await donation_crud.create(
-        donation, session, user
+    return await execute_bulk_investment_process(
+        donations, session, user
     )
-    await execute_investment_process(new_donation, session)
-    await session.refresh(new_donation)
-    return new_donation
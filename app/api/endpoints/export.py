@@ -0,0 +1,61 @@
+from http import HTTPStatus
+from uuid import UUID
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import FileResponse
+
+from app.api.validators import check_export_exists, check_export_is_done
+from app.core.user import current_superuser
+from app.schemas.export import ExportCreate, ExportDB
+from app.services.export import exporter
+
+router = APIRouter()
+
+
+@router.post(
+    '/',
+    response_model=ExportDB,
+    status_code=HTTPStatus.ACCEPTED,
+    dependencies=[Depends(current_superuser)]
+)
+async def create_export(
+    export_in: ExportCreate
+):
+    """Start an export of all the projects or donations to a file.
+        The file is written in the background, poll the export status.
+        Endpoint is available only for superusers.
+    """
+    return exporter.start(export_in)
+
+
+@router.get(
+    '/{export_id}',
+    response_model=ExportDB,
+    dependencies=[Depends(current_superuser)]
+)
+async def get_export(
+    export_id: UUID
+):
+    """Get the status of the export.
+        Endpoint is available only for superusers.
+    """
+    export, _ = await check_export_exists(export_id)
+    return export
+
+
+@router.get(
+    '/{export_id}/file',
+    response_class=FileResponse,
+    dependencies=[Depends(current_superuser)]
+)
+async def download_export(
+    export_id: UUID
+):
+    """Download the file of the finished export.
+        Endpoint is available only for superusers.
+    """
+    export, path = await check_export_exists(export_id)
+    await check_export_is_done(export)
+    return FileResponse(
+        path, filename=f'{export.model.value}.{export.format.value}'
+    )
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import get_read_session
+from app.core.user import current_superuser
+from app.crud.fund_stats import fund_stats_crud
+from app.schemas.fund_stats import FundingGap, FundStatsDB
+
+router = APIRouter()
+
+
+@router.get(
+    '/',
+    response_model=FundStatsDB,
+    dependencies=[Depends(current_superuser)]
+)
+async def get_fund_stats(
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Get the totals of the whole fund.
+        The average close time of the projects is in seconds.
+        Endpoint is available only for superusers.
+    """
+    fund_stats = await fund_stats_crud.get_fund_stats(session)
+    await session.close()
+    return FundStatsDB(**fund_stats._mapping)
+
+
+@router.get(
+    '/funding-gap',
+    response_model=FundingGap
+)
+async def get_funding_gap(
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Get the amount the open projects still need
+        and the amount of the donations waiting for a project.
+        Endpoint is available for all users.
+    """
+    open_amounts = await fund_stats_crud.get_open_amounts(session)
+    await session.close()
+    return FundingGap(**open_amounts._mapping)
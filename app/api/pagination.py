@@ -0,0 +1,76 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from http import HTTPStatus
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy.engine import Row
+
+from app.models import CharityProject, Donation
+
+PAGE_MAX_LIMIT = 1000
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+INVALID_CURSOR_ERROR = 'Некорректный курсор страницы!'
+
+
+def encode_cursor(key: List) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str, key_types: Sequence[Callable]) -> Tuple:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(key) != len(key_types):
+            raise ValueError(cursor)
+        return tuple(
+            key_type(value) for key_type, value in zip(key_types, key)
+        )
+    except (binascii.Error, TypeError, ValueError):
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=INVALID_CURSOR_ERROR
+        )
+
+
+class Page:
+    """Keyset page over (create_date, id).
+        Without the limit the whole list is returned.
+        The cursor of the next page is sent in the X-Next-Cursor header,
+        so the response body stays a plain list.
+    """
+    key_types = (datetime.fromisoformat, int)
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=PAGE_MAX_LIMIT),
+        cursor: Optional[str] = None
+    ):
+        self.limit = limit
+        self.after = None if cursor is None else decode_cursor(
+            cursor, self.key_types
+        )
+
+    @staticmethod
+    def get_key(db_object: Union[CharityProject, Donation, Row]) -> List:
+        return [db_object.create_date.isoformat(), db_object.id]
+
+    def set_next_cursor(
+        self,
+        response: Response,
+        db_objects: List[Union[CharityProject, Donation, Row]]
+    ) -> None:
+        if self.limit is not None and len(db_objects) == self.limit:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+                self.get_key(db_objects[-1])
+            )
+
+
+class SearchPage(Page):
+    """Keyset page over (rank, id) of the full-text search results."""
+    key_types = (float, int)
+
+    @staticmethod
+    def get_key(row: Row) -> List:
+        return [row.rank, row.id]
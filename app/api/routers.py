@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 
 from app.api.endpoints import (charityproject_router, donation_router,
-                               user_router)
+                               export_router, fund_stats_router, user_router)
 
 main_router = APIRouter()
 
@@ -16,3 +16,11 @@ main_router.include_router(
     prefix='/charity_project',
     tags=('Charity Projects',)
 )
+
+main_router.include_router(
+    export_router, prefix='/export', tags=['Exports']
+)
+
+main_router.include_router(
+    fund_stats_router, prefix='/stats', tags=['Statistics']
+)
@@ -1,13 +1,22 @@
 from http import HTTPStatus
+from pathlib import Path
+from typing import Tuple
+from uuid import UUID
 
 from fastapi import HTTPException
 from pydantic import PositiveInt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.charity_project import charityproject_crud
-from app.models import CharityProject
+from app.crud.donation import donation_crud
+from app.models import CharityProject, Donation, User
+from app.schemas.export import ExportDB, ExportStatus
+from app.services.export import exporter
 
 PROJECT_NOT_FOUND_ERROR = 'Данный проект не найден!'
+DONATION_NOT_FOUND_ERROR = 'Данное пожертвование не найдено!'
+EXPORT_NOT_FOUND_ERROR = 'Данная выгрузка не найдена!'
+EXPORT_NOT_DONE_ERROR = 'Файл выгрузки ещё не готов!'
 PROJECT_EXISTS_ERROR = 'Проект с таким именем уже существует!'
 FORBIDDEN_UPDATE_ERROR = 'Закрытый проект нельзя редактировать!'
 INVESTED_RPOJECT_DELETION_ERROR = (
@@ -34,6 +43,46 @@ async def check_charity_project_exists(
     return charity_project
 
 
+async def check_donation_exists(
+    donation_id: int,
+    session: AsyncSession,
+    user: User
+) -> Donation:
+    donation = await donation_crud.get_donation(
+        object_id=donation_id, session=session
+    )
+    if not donation or (
+        not user.is_superuser and donation.user_id != user.id
+    ):
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=DONATION_NOT_FOUND_ERROR
+        )
+    return donation
+
+
+async def check_export_exists(
+    export_id: UUID
+) -> Tuple[ExportDB, Path]:
+    export = exporter.get(export_id)
+    if export is None:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=EXPORT_NOT_FOUND_ERROR
+        )
+    return export
+
+
+async def check_export_is_done(
+    export: ExportDB
+) -> None:
+    if export.status != ExportStatus.done:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=EXPORT_NOT_DONE_ERROR
+        )
+
+
 async def check_name_duplicate(
     project_name: str,
     session: AsyncSession
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, Literal, Optional, Union
 
 from pydantic import BaseSettings, EmailStr
 
@@ -7,9 +7,37 @@ class Settings(BaseSettings):
     app_title: str = 'Charity Project'
     app_description: str = 'Приложение для Благотворительного фонда поддержки котиков QRKot.'
     database_url: str = 'sqlite+aiosqlite:///./charity_fund.db'
+    replica_url: Optional[str] = None
+    pool_size: int = 5
+    pool_max_overflow: int = 10
+    pool_recycle: int = 3600
+    sqlite_journal_mode: str = 'wal'
+    sqlite_synchronous: str = 'normal'
+    sqlite_busy_timeout: int = 5000
+    sqlite_cache_size: int = -64000
+    sqlite_mmap_size: int = 268435456
+    sqlite_temp_store: str = 'memory'
     secret: str = 'SECRET'
     first_superuser_email: Optional[EmailStr] = None
     first_superuser_password: Optional[str] = None
+    investment_engine: Literal['orm', 'sql', 'pool'] = 'orm'
+    allocation_mode: Literal['inline', 'batched', 'deferred'] = 'inline'
+    allocation_batch_size: int = 100
+    allocation_batch_timeout: float = 0.01
+    allocation_poll_interval: float = 1.0
+    export_dir: str = './exports'
+
+    @property
+    def sqlite_pragmas(self) -> Dict[str, Union[int, str]]:
+        """Pragmas set on every new SQLite connection."""
+        return {
+            'journal_mode': self.sqlite_journal_mode,
+            'synchronous': self.sqlite_synchronous,
+            'busy_timeout': self.sqlite_busy_timeout,
+            'cache_size': self.sqlite_cache_size,
+            'mmap_size': self.sqlite_mmap_size,
+            'temp_store': self.sqlite_temp_store,
+        }
 
     class Config:
         env_file = '.env'
@@ -1,11 +1,19 @@
 from datetime import datetime
+from functools import partial
+from typing import Union
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, engine
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import (Boolean, Column, Computed, DateTime, Index, Integer,
+                        engine, event, text, true)
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.orm import declarative_base, declared_attr, sessionmaker
 
 from app.core.config import settings
 
+WRITE_PRAGMAS = ('journal_mode', 'synchronous')
+WRITE_LOCK = 'sqlite_write_lock'
+
 
 class PreBase:
 
@@ -27,12 +35,163 @@ class PreBaseDonationCharity(Base):
     fully_invested = Column(Boolean, default=False)
     create_date = Column(DateTime, default=datetime.now)
     close_date = Column(DateTime)
+    version = Column(Integer, nullable=False)
+    allocated = Column(Boolean, default=True, server_default=true())
+    remaining_amount = Column(
+        Integer, Computed('full_amount - invested_amount', persisted=True)
+    )
+
+    @declared_attr
+    def __mapper_args__(cls):
+        return {'version_id_col': cls.version}
+
+    @declared_attr
+    def __table_args__(cls):
+        """Indexes of all, open and pending objects in FIFO order.
+            The lists and the allocators walk them instead of scanning
+            and sorting the whole table.
+        """
+        return (
+            Index(f'ix_{cls.__tablename__}_create_date', 'create_date', 'id'),
+            Index(
+                f'ix_{cls.__tablename__}_open',
+                'create_date',
+                'id',
+                'remaining_amount',
+                sqlite_where=text('fully_invested = 0')
+            ),
+            Index(
+                f'ix_{cls.__tablename__}_pending',
+                'create_date',
+                'id',
+                sqlite_where=text('allocated = 0')
+            ),
+        )
+
+
+def set_sqlite_pragmas(
+    dbapi_connection,
+    connection_record,
+    read_only: bool = False
+) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma, value in settings.sqlite_pragmas.items():
+        if not (read_only and pragma in WRITE_PRAGMAS):
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+    cursor.close()
+
+
+def disable_driver_transactions(dbapi_connection, connection_record) -> None:
+    dbapi_connection.isolation_level = None
+
+
+def begin_transaction(connection) -> None:
+    if connection.get_execution_options().get(WRITE_LOCK):
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+    else:
+        connection.exec_driver_sql('BEGIN')
+
 
+async def begin_write(session: AsyncSession) -> None:
+    """Begin the transaction of the session with the write lock taken.
+        A writer waits busy_timeout for the lock before its first read,
+        instead of failing to upgrade a read snapshot
+        another writer has made stale.
+        A transaction already begun by a read is kept as it is.
+    """
+    if not session.in_transaction():
+        await session.connection(execution_options={WRITE_LOCK: True})
 
-engine = create_async_engine(settings.database_url)
+
+def is_sqlite_file(url: URL) -> bool:
+    return (
+        url.get_backend_name() == 'sqlite' and
+        url.database not in (None, '', ':memory:')
+    )
+
+
+def get_read_only_url(url: URL) -> URL:
+    """The same SQLite file opened with read-only connections."""
+    return url.set(
+        database=f'file:{url.database}',
+        query=dict(url.query, mode='ro', uri='true')
+    )
+
+
+def create_database_engine(
+    database_url: Union[str, URL],
+    tuned: bool = True,
+    read_only: bool = False
+) -> AsyncEngine:
+    """Engine with the SQLite profile of the settings.
+        A file database gets a pool of open connections
+        and every new connection gets the pragmas.
+        The transactions are begun by the engine, not by the driver,
+        so the reads of a transaction see one snapshot.
+        Transactions begin deferred, the ones of begin_write
+        take the write lock at once with BEGIN IMMEDIATE.
+        With read_only a file is opened read-only
+        and the pragmas changing the file are skipped.
+        Without tuned the driver defaults are kept.
+    """
+    url = make_url(database_url)
+    if read_only and is_sqlite_file(url):
+        url = get_read_only_url(url)
+    if not tuned or url.get_backend_name() != 'sqlite':
+        return create_async_engine(url)
+    options = {}
+    if is_sqlite_file(url):
+        options = dict(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=settings.pool_size,
+            max_overflow=settings.pool_max_overflow,
+            pool_recycle=settings.pool_recycle
+        )
+    database_engine = create_async_engine(url, **options)
+    event.listen(
+        database_engine.sync_engine,
+        'connect',
+        partial(set_sqlite_pragmas, read_only=read_only)
+    )
+    event.listen(
+        database_engine.sync_engine, 'connect', disable_driver_transactions
+    )
+    event.listen(database_engine.sync_engine, 'begin', begin_transaction)
+    return database_engine
+
+
+def create_read_engine() -> AsyncEngine:
+    """Engine for the requests which only read.
+        The replica is used if it is configured,
+        otherwise a SQLite file is opened once more read-only,
+        so the readers do not wait for the writer's connections.
+        Any other database is read through the writer's engine.
+    """
+    if settings.replica_url is not None:
+        return create_database_engine(settings.replica_url, read_only=True)
+    if is_sqlite_file(make_url(settings.database_url)):
+        return create_database_engine(settings.database_url, read_only=True)
+    return engine
+
+
+engine = create_database_engine(settings.database_url)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession)
+read_engine = create_read_engine()
+ReadSessionLocal = sessionmaker(
+    read_engine, class_=AsyncSession, expire_on_commit=False
+)
 
 
 async def get_async_session():
     async with AsyncSessionLocal() as async_session:
         yield async_session
+
+
+async def get_read_session():
+    """Session of the read engine for one request.
+        All the reads of the handler see one snapshot,
+        the handler closes the session after its last query,
+        so the connection goes back before the response is serialized.
+    """
+    async with ReadSessionLocal() as async_session:
+        yield async_session
@@ -1,15 +1,16 @@
-from typing import Union
+from typing import Optional, Union
 
 from fastapi import Depends
 from fastapi_users import (BaseUserManager, FastAPIUsers, IntegerIDMixin,
                            InvalidPasswordException)
 from fastapi_users.authentication import (AuthenticationBackend,
-                                          BearerTransport, JWTStrategy)
+                                          Authenticator, BearerTransport,
+                                          JWTStrategy)
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.db import get_async_session
+from app.core.db import get_async_session, get_read_session
 from app.models.user import User
 from app.schemas.user import UserCreate
 from app.services.constants import JWT_TOKEN_LIFETIME, MIN_PASSWORD_LENGTH
@@ -32,8 +33,33 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
             )
 
 
+class UserDatabase(SQLAlchemyUserDatabase):
+    """Users looked up with the transaction of the lookup ended at once.
+        The auth of a request reads in a transaction of its own,
+        and the login and the register return the writer's connection
+        before the password is verified or hashed.
+        The user found stays loaded, so it is used detached.
+    """
+
+    async def get(self, id: int) -> Optional[User]:
+        try:
+            return await super().get(id)
+        finally:
+            await self.session.close()
+
+    async def get_by_email(self, email: str) -> Optional[User]:
+        try:
+            return await super().get_by_email(email)
+        finally:
+            await self.session.close()
+
+
 async def get_user_db(session: AsyncSession = Depends(get_async_session)):
-    yield SQLAlchemyUserDatabase(session, User)
+    yield UserDatabase(session, User)
+
+
+async def get_read_user_db(session: AsyncSession = Depends(get_read_session)):
+    yield UserDatabase(session, User)
 
 
 bearer_transport = BearerTransport(tokenUrl='auth/jwt/login')
@@ -54,10 +80,20 @@ async def get_user_manager(user_db=Depends(get_user_db)):
     yield UserManager(user_db)
 
 
+async def get_read_user_manager(user_db=Depends(get_read_user_db)):
+    yield UserManager(user_db)
+
+
 fastapi_users = FastAPIUsers[User, int](
     get_user_manager,
     [auth_backend]
 )
 
-current_user = fastapi_users.current_user(active=True)
-current_superuser = fastapi_users.current_user(active=True, superuser=True)
+# The user of a request is looked up through the read engine,
+# so the auth does not take a connection of the writer.
+read_authenticator = Authenticator([auth_backend], get_read_user_manager)
+
+current_user = read_authenticator.current_user(active=True)
+current_superuser = read_authenticator.current_user(
+    active=True, superuser=True
+)
@@ -1,8 +1,12 @@
-from typing import Generic, List, Optional, Type, TypeVar
+from datetime import datetime
+from typing import Generic, List, Optional, Sequence, Tuple, Type, TypeVar
 
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import inspect, select, true, tuple_
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.expression import false
 
 from app.core.db import Base
 from app.models import User
@@ -11,6 +15,8 @@ ModelType = TypeVar('ModelType', bound=Base)
 CreateSchemaType = TypeVar('CreateSchemaType', bound=BaseModel)
 UpdateSchemaType = TypeVar('UpdateSchemaType', bound=Optional[BaseModel])
 
+BULK_INSERT_CHUNK_SIZE = 1000
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
@@ -20,17 +26,58 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ):
         self.model = model
 
-    async def get_multiple(
+    def select_page(
         self,
-        session: AsyncSession
-    ) -> List[ModelType]:
-        db_objects = await session.execute(select(self.model))
-        return db_objects.scalars().all()
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+        fully_invested: Optional[bool] = None,
+        columns: Optional[Sequence[str]] = None
+    ) -> Select:
+        """Objects in (create_date, id) order starting after the key.
+            The key condition is served by the index,
+            so a page costs the same at any depth.
+            With the columns only they are selected instead of the objects.
+        """
+        if columns:
+            query = select(*(getattr(self.model, name) for name in columns))
+        else:
+            query = select(self.model)
+        if fully_invested is not None:
+            query = query.where(
+                self.model.fully_invested == (
+                    true() if fully_invested else false()
+                )
+            )
+        if after is not None:
+            key = (self.model.create_date, self.model.id)
+            query = query.where(
+                tuple_(*key) > tuple_(
+                    *after, types=[column.type for column in key]
+                )
+            )
+        return query.order_by(
+            self.model.create_date, self.model.id
+        ).limit(limit)
 
-    async def create(
+    async def get_rows(
         self,
-        object_in,
         session: AsyncSession,
+        columns: Sequence[str],
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+        fully_invested: Optional[bool] = None,
+        **filters
+    ) -> List[Row]:
+        rows = await session.execute(
+            self.select_page(
+                limit, after, fully_invested, columns
+            ).filter_by(**filters)
+        )
+        return rows.all()
+
+    def build(
+        self,
+        object_in,
         user: Optional[User] = None
     ) -> ModelType:
         object_in_data = object_in.dict()
@@ -38,9 +85,30 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         if user is not None:
             object_in_data['user_id'] = user.id
 
-        db_object = self.model(**object_in_data)
+        return self.model(**object_in_data)
+
+    async def create(
+        self,
+        object_in,
+        session: AsyncSession,
+        user: Optional[User] = None
+    ) -> ModelType:
+        db_object = self.build(object_in, user)
 
         session.add(db_object)
         await session.commit()
-        await session.refresh(db_object)
+        await self.refresh(db_object, session)
         return db_object
+
+    async def refresh(
+        self,
+        db_object: ModelType,
+        session: AsyncSession
+    ) -> None:
+        """Reload all the columns, the deferred ones included."""
+        await session.refresh(
+            db_object,
+            attribute_names=[
+                column.key for column in inspect(self.model).column_attrs
+            ]
+        )
@@ -1,14 +1,51 @@
-from typing import Optional
+from typing import List, Optional, Sequence, Tuple
 
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy import select
+from sqlalchemy import (Float, Integer, bindparam, column, literal_column,
+                        select, table, tuple_)
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
 
 from app.crud.base import CRUDBase
-from app.models.charity_project import CharityProject
+from app.models.charity_project import CHARITY_PROJECT_FTS, CharityProject
 from app.schemas.charity_project import (CharityProjectCreate,
                                          CharityProjectUpdate)
 
+charity_project_fts = table(
+    CHARITY_PROJECT_FTS, column('rowid', Integer), column('rank', Float)
+)
+
+# The hot statements are built once, so a call only binds the parameters
+# and finds the compiled statement by its memoized cache key.
+SELECT_PROJECT = select(CharityProject).where(
+    CharityProject.id == bindparam('project_id')
+).options(
+    undefer(CharityProject.description)
+)
+SELECT_PROJECT_ID_BY_NAME = select(CharityProject.id).where(
+    CharityProject.name == bindparam('project_name')
+)
+SELECT_PROJECT_CLOSE_DATE = select(CharityProject.close_date).where(
+    CharityProject.id == bindparam('project_id')
+)
+SELECT_PROJECT_VERSION = select(CharityProject.version).where(
+    CharityProject.id == bindparam('project_id')
+)
+SELECT_PROJECT_INVESTED_AMOUNT = select(CharityProject.invested_amount).where(
+    CharityProject.id == bindparam('project_id')
+)
+
+
+def get_match_query(text: str) -> str:
+    """Every word of the text as a quoted prefix.
+        Quoting keeps the FTS5 query syntax out of the user input,
+        the words are matched all at once.
+    """
+    return ' '.join(
+        '"{}"*'.format(word.replace('"', '""')) for word in text.split()
+    )
+
 
 class CRUDCharityProject(
     CRUDBase[
@@ -24,9 +61,7 @@ class CRUDCharityProject(
         session: AsyncSession
     ) -> Optional[CharityProject]:
         charityproject_db = await session.execute(
-            select(CharityProject).where(
-                CharityProject.id == object_id
-            )
+            SELECT_PROJECT, {'project_id': object_id}
         )
         return charityproject_db.scalars().first()
 
@@ -36,9 +71,7 @@ class CRUDCharityProject(
         session: AsyncSession
     ) -> Optional[int]:
         charity_project = await session.execute(
-            select(CharityProject.id).where(
-                CharityProject.name == project_name
-            )
+            SELECT_PROJECT_ID_BY_NAME, {'project_name': project_name}
         )
         return charity_project.scalars().first()
 
@@ -48,24 +81,65 @@ class CRUDCharityProject(
         session: AsyncSession
     ):
         project_close_date = await session.execute(
-            select(CharityProject.close_date).where(
-                CharityProject.id == project_id
-            )
+            SELECT_PROJECT_CLOSE_DATE, {'project_id': project_id}
         )
         return project_close_date.scalars().first()
 
+    async def get_charity_project_version(
+        self,
+        project_id: int,
+        session: AsyncSession
+    ) -> Optional[int]:
+        project_version = await session.execute(
+            SELECT_PROJECT_VERSION, {'project_id': project_id}
+        )
+        return project_version.scalars().first()
+
     async def get_charity_project_invested_amount(
         self,
         project_id: int,
         session: AsyncSession
     ):
         project_invested_amount = await session.execute(
-            select(CharityProject.invested_amount).where(
-                CharityProject.id == project_id
-            )
+            SELECT_PROJECT_INVESTED_AMOUNT, {'project_id': project_id}
         )
         return project_invested_amount.scalars().first()
 
+    async def search(
+        self,
+        session: AsyncSession,
+        text: str,
+        columns: Sequence[str],
+        limit: Optional[int] = None,
+        after: Optional[Tuple[float, int]] = None
+    ) -> List[Row]:
+        """Projects matching the text, the most relevant first.
+            The rows carry the bm25 rank of the match
+            to build the cursor of the next page.
+        """
+        match_query = get_match_query(text)
+        if not match_query:
+            return []
+        key = (charity_project_fts.c.rank, CharityProject.id)
+        query = select(
+            *(getattr(CharityProject, name) for name in columns),
+            charity_project_fts.c.rank
+        ).join_from(
+            charity_project_fts,
+            CharityProject,
+            CharityProject.id == charity_project_fts.c.rowid
+        ).where(
+            literal_column(CHARITY_PROJECT_FTS).op('MATCH')(match_query)
+        )
+        if after is not None:
+            query = query.where(
+                tuple_(*key) > tuple_(
+                    *after, types=[key_column.type for key_column in key]
+                )
+            )
+        rows = await session.execute(query.order_by(*key).limit(limit))
+        return rows.all()
+
     async def update(
         self,
         db_object,
@@ -81,7 +155,7 @@ class CRUDCharityProject(
 
         session.add(db_object)
         await session.commit()
-        await session.refresh(db_object)
+        await self.refresh(db_object, session)
         return db_object
 
     async def remove(
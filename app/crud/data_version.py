@@ -0,0 +1,55 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import begin_write
+from app.crud.base import CRUDBase
+from app.models.data_version import DATA_VERSION_ID, DataVersion
+
+SELECT_VERSION = select(DataVersion.version).where(
+    DataVersion.id == DATA_VERSION_ID
+)
+SELECT_DATA_VERSION = select(DataVersion).where(
+    DataVersion.id == DATA_VERSION_ID
+)
+LOCK_DATA_VERSION = update(DataVersion).where(
+    DataVersion.id == DATA_VERSION_ID
+).values(
+    version=DataVersion.version
+).execution_options(synchronize_session=False)
+
+
+class CRUDDataVersion(
+    CRUDBase[
+        DataVersion,
+        None,
+        None
+    ]
+):
+
+    async def get_version(
+        self,
+        session: AsyncSession
+    ) -> int:
+        version = await session.execute(SELECT_VERSION)
+        return version.scalar_one()
+
+    async def get_data_version(
+        self,
+        session: AsyncSession
+    ) -> DataVersion:
+        data_version = await session.execute(SELECT_DATA_VERSION)
+        return data_version.scalars().one()
+
+    async def lock(
+        self,
+        session: AsyncSession
+    ) -> None:
+        """Start a write transaction.
+            A no-op write takes the database write lock,
+            so nobody can change the data until the commit.
+        """
+        await begin_write(session)
+        await session.execute(LOCK_DATA_VERSION)
+
+
+data_version_crud = CRUDDataVersion(DataVersion)
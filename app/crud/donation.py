@@ -1,12 +1,19 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import bindparam, func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
-from app.crud.base import CRUDBase
+from app.crud.base import BULK_INSERT_CHUNK_SIZE, CRUDBase
+from app.crud.data_version import data_version_crud
 from app.models import Donation, User
 from app.schemas.donation import DonationCreate
 
+SELECT_DONATION = select(Donation).where(
+    Donation.id == bindparam('donation_id')
+)
+
 
 class CRUDDonation(
     CRUDBase[
@@ -16,17 +23,58 @@ class CRUDDonation(
     ]
 ):
 
-    async def get_donations_by_user(
+    async def get_donation(
+            self,
+            object_id: int,
+            session: AsyncSession
+    ) -> Optional[Donation]:
+        donation = await session.execute(
+            SELECT_DONATION, {'donation_id': object_id}
+        )
+        return donation.scalars().first()
+
+    async def create_multiple(
             self,
+            objects_in: List[DonationCreate],
             session: AsyncSession,
-            user: User
+            user: Optional[User] = None
     ) -> List[Donation]:
-        donations = await session.execute(
-            select(Donation).where(
-                Donation.user_id == user.id
+        """Insert the donations with multi-row INSERT statements.
+            Ids are given out under the database write lock,
+            so the new objects are not selected back.
+        """
+        await data_version_crud.lock(session)
+        last_id = await session.execute(select(func.max(Donation.id)))
+        last_id = last_id.scalar() or 0
+        create_date = datetime.now()
+        rows = [
+            dict(
+                object_in.dict(),
+                id=donation_id,
+                user_id=user.id if user is not None else None,
+                invested_amount=0,
+                fully_invested=False,
+                create_date=create_date,
+                close_date=None,
+                version=1
+            ) for donation_id, object_in in enumerate(
+                objects_in, start=last_id + 1
             )
-        )
-        return donations.scalars().all()
+        ]
+        for start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+            await session.execute(
+                insert(Donation).values(
+                    rows[start:start + BULK_INSERT_CHUNK_SIZE]
+                )
+            )
+
+        donations = []
+        for row in rows:
+            donation = Donation(**row)
+            make_transient_to_detached(donation)
+            session.add(donation)
+            donations.append(donation)
+        return donations
 
 
 donation_crud = CRUDDonation(Donation)
@@ -0,0 +1,41 @@
+from typing import Optional
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models import DonationSummary
+
+SELECT_SUMMARY = select(
+    DonationSummary.donated_amount,
+    DonationSummary.invested_amount,
+    (
+        DonationSummary.donated_amount - DonationSummary.invested_amount
+    ).label('open_amount'),
+    DonationSummary.donations_count
+).where(
+    DonationSummary.user_id == bindparam('user_id')
+)
+
+
+class CRUDDonationSummary(
+    CRUDBase[
+        DonationSummary,
+        None,
+        None
+    ]
+):
+
+    async def get_summary_by_user(
+            self,
+            user_id: int,
+            session: AsyncSession
+    ) -> Optional[Row]:
+        summary = await session.execute(
+            SELECT_SUMMARY, {'user_id': user_id}
+        )
+        return summary.first()
+
+
+donation_summary_crud = CRUDDonationSummary(DonationSummary)
@@ -0,0 +1,122 @@
+from sqlalchemy import Float, Integer, case, cast, func, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.expression import false, true
+
+from app.crud.base import CRUDBase
+from app.models import CharityProject, Donation, FundStats
+from app.models.fund_stats import FUND_STATS_ID
+
+SECONDS_PER_DAY = 86400
+SELECT_OPEN_AMOUNTS = select(
+    FundStats.open_projects_amount,
+    (
+        FundStats.donated_amount - FundStats.invested_amount
+    ).label('open_donations_amount')
+).where(
+    FundStats.id == FUND_STATS_ID
+)
+
+
+class CRUDFundStats(
+    CRUDBase[
+        FundStats,
+        None,
+        None
+    ]
+):
+
+    async def get_fund_stats(
+            self,
+            session: AsyncSession
+    ) -> Row:
+        fund_stats = await session.execute(
+            select(
+                FundStats.donated_amount,
+                FundStats.invested_amount,
+                (
+                    FundStats.donated_amount - FundStats.invested_amount
+                ).label('open_donations_amount'),
+                FundStats.open_projects_amount,
+                FundStats.open_projects,
+                FundStats.closed_projects,
+                case(
+                    (
+                        FundStats.closed_projects > 0,
+                        cast(FundStats.close_seconds, Float) /
+                        FundStats.closed_projects
+                    ),
+                    else_=None
+                ).label('average_close_seconds')
+            ).where(
+                FundStats.id == FUND_STATS_ID
+            )
+        )
+        return fund_stats.one()
+
+    async def get_open_amounts(
+            self,
+            session: AsyncSession
+    ) -> Row:
+        """Amounts the open projects need and the open donations hold."""
+        open_amounts = await session.execute(SELECT_OPEN_AMOUNTS)
+        return open_amounts.one()
+
+    async def get_raw_stats(
+            self,
+            session: AsyncSession
+    ) -> Row:
+        fund_stats = await session.execute(
+            select(
+                FundStats.donated_amount,
+                FundStats.invested_amount,
+                FundStats.open_projects,
+                FundStats.closed_projects,
+                FundStats.close_seconds,
+                FundStats.open_projects_amount
+            ).where(
+                FundStats.id == FUND_STATS_ID
+            )
+        )
+        return fund_stats.one()
+
+    async def rebuild(
+            self,
+            session: AsyncSession
+    ) -> None:
+        """Recount the totals from the projects and donations."""
+        project_lifetime = cast(func.round((
+            func.julianday(CharityProject.close_date) -
+            func.julianday(CharityProject.create_date)
+        ) * SECONDS_PER_DAY), Integer)
+        fully_invested = func.coalesce(CharityProject.fully_invested, false())
+        await session.execute(
+            update(FundStats).where(
+                FundStats.id == FUND_STATS_ID
+            ).values(
+                donated_amount=select(
+                    func.coalesce(func.sum(Donation.full_amount), 0)
+                ).scalar_subquery(),
+                invested_amount=select(
+                    func.coalesce(func.sum(Donation.invested_amount), 0)
+                ).scalar_subquery(),
+                open_projects=select(func.count()).where(
+                    fully_invested == false()
+                ).scalar_subquery(),
+                closed_projects=select(func.count()).where(
+                    fully_invested == true()
+                ).scalar_subquery(),
+                close_seconds=select(
+                    func.coalesce(func.sum(project_lifetime), 0)
+                ).where(
+                    fully_invested == true()
+                ).scalar_subquery(),
+                open_projects_amount=select(func.coalesce(func.sum(
+                    CharityProject.full_amount -
+                    func.coalesce(CharityProject.invested_amount, 0)
+                ), 0)).scalar_subquery()
+            ).execution_options(synchronize_session=False)
+        )
+
+
+fund_stats_crud = CRUDFundStats(FundStats)
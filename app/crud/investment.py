@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import BULK_INSERT_CHUNK_SIZE, CRUDBase
+from app.models import Investment
+
+
+class CRUDInvestment(
+    CRUDBase[
+        Investment,
+        None,
+        None
+    ]
+):
+
+    async def create_multiple(
+            self,
+            investments: List[Dict[str, int]],
+            session: AsyncSession
+    ) -> None:
+        created_at = datetime.now()
+        for start in range(0, len(investments), BULK_INSERT_CHUNK_SIZE):
+            await session.execute(
+                insert(Investment).values([
+                    dict(investment, created_at=created_at) for investment
+                    in investments[start:start + BULK_INSERT_CHUNK_SIZE]
+                ])
+            )
+
+    async def get_investments_by_donation(
+            self,
+            donation_id: int,
+            session: AsyncSession
+    ) -> List[Investment]:
+        investments = await session.execute(
+            select(Investment).where(
+                Investment.donation_id == donation_id
+            ).order_by(Investment.id)
+        )
+        return investments.scalars().all()
+
+    async def get_investments_by_project(
+            self,
+            project_id: int,
+            session: AsyncSession
+    ) -> List[Investment]:
+        investments = await session.execute(
+            select(Investment).where(
+                Investment.project_id == project_id
+            ).order_by(Investment.id)
+        )
+        return investments.scalars().all()
+
+
+investment_crud = CRUDInvestment(Investment)
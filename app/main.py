@@ -2,6 +2,9 @@ from fastapi import FastAPI
 
 from app.api.routers import main_router
 from app.core.config import settings
+from app.services.allocation_worker import allocation_worker
+from app.services.deferred_worker import deferred_worker
+from app.services.open_pool import rebuild_open_pool
 
 app = FastAPI(
     title=settings.app_title,
@@ -9,3 +12,21 @@ app = FastAPI(
 )
 
 app.include_router(main_router)
+
+
+@app.on_event('startup')
+async def startup():
+    if settings.investment_engine == 'pool':
+        await rebuild_open_pool()
+    if settings.allocation_mode == 'batched':
+        await allocation_worker.start()
+    if settings.allocation_mode == 'deferred':
+        await deferred_worker.start()
+
+
+@app.on_event('shutdown')
+async def shutdown():
+    if allocation_worker.task is not None:
+        await allocation_worker.stop()
+    if deferred_worker.task is not None:
+        await deferred_worker.stop()
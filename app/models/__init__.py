@@ -1,3 +1,7 @@
 from .charity_project import CharityProject  # noqa
+from .data_version import DataVersion  # noqa
 from .donation import Donation  # noqa
+from .donation_summary import DonationSummary  # noqa
+from .fund_stats import FundStats  # noqa
+from .investment import Investment  # noqa
 from .user import User  # noqa
\ No newline at end of file
@@ -1,11 +1,63 @@
-from sqlalchemy import Column, String, Text
+from sqlalchemy import DDL, Column, String, Text, event
+from sqlalchemy.orm import deferred
 
-from app.core.db import PreBaseDonationCharity
+from app.core.db import Base, PreBaseDonationCharity
+
+CHARITY_PROJECT_FTS = 'charityproject_fts'
+FTS_INSERT = (
+    f'INSERT INTO {CHARITY_PROJECT_FTS} (rowid, name, description) '
+    'VALUES (NEW.id, NEW.name, NEW.description); '
+)
+FTS_DELETE = (
+    f'INSERT INTO {CHARITY_PROJECT_FTS} '
+    f'({CHARITY_PROJECT_FTS}, rowid, name, description) '
+    "VALUES ('delete', OLD.id, OLD.name, OLD.description); "
+)
+FTS_TRIGGERS = {
+    'INSERT': FTS_INSERT,
+    'UPDATE OF name, description': FTS_DELETE + FTS_INSERT,
+    'DELETE': FTS_DELETE,
+}
+FTS_TRIGGER = (
+    'CREATE TRIGGER IF NOT EXISTS charityproject_{name}_fts '
+    'AFTER {operation} ON charityproject '
+    'BEGIN {statements}END'
+)
 
 
 class CharityProject(PreBaseDonationCharity):
     name = Column(String(255), unique=True, nullable=False)
-    description = Column(Text, nullable=False)
+    description = deferred(Column(Text, nullable=False))
 
     def __repr__(self) -> str:
         return f'Фонд {self.name}'
+
+
+# The full-text index reads the texts from the projects table
+# and is kept in sync by the triggers.
+event.listen(
+    Base.metadata,
+    'after_create',
+    DDL(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {CHARITY_PROJECT_FTS} '
+        'USING fts5(name, description, '
+        "content='charityproject', content_rowid='id')"
+    )
+)
+
+for operation, statements in FTS_TRIGGERS.items():
+    event.listen(
+        Base.metadata,
+        'after_create',
+        DDL(FTS_TRIGGER.format(
+            name=operation.split()[0],
+            operation=operation,
+            statements=statements
+        ))
+    )
+
+event.listen(
+    Base.metadata,
+    'before_drop',
+    DDL(f'DROP TABLE IF EXISTS {CHARITY_PROJECT_FTS}')
+)
@@ -0,0 +1,44 @@
+from sqlalchemy import DDL, Column, DateTime, Integer, event
+
+from app.core.db import Base
+
+DATA_VERSION_ID = 1
+VERSIONED_TABLES = ('charityproject', 'donation')
+VERSION_TRIGGER = (
+    'CREATE TRIGGER IF NOT EXISTS {table}_{operation}_data_version '
+    'AFTER {operation} ON {table} '
+    'BEGIN '
+    'UPDATE dataversion SET version = version + 1, '
+    'updated_at = CURRENT_TIMESTAMP WHERE id = {id}; '
+    'END'
+)
+
+
+class DataVersion(Base):
+    """Counter of the writes to the projects and donations.
+        It is bumped by the database triggers,
+        so writes from any process are taken into account.
+        updated_at is the UTC time of the last write.
+    """
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime)
+
+
+event.listen(
+    DataVersion.__table__,
+    'after_create',
+    DDL(
+        'INSERT INTO dataversion (id, version, updated_at) '
+        f'VALUES ({DATA_VERSION_ID}, 0, CURRENT_TIMESTAMP)'
+    )
+)
+
+for table in VERSIONED_TABLES:
+    for operation in ('INSERT', 'UPDATE', 'DELETE'):
+        event.listen(
+            Base.metadata,
+            'after_create',
+            DDL(VERSION_TRIGGER.format(
+                table=table, operation=operation, id=DATA_VERSION_ID
+            ))
+        )
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, ForeignKey, Integer, Text
+from sqlalchemy import Column, ForeignKey, Index, Integer, Text
+from sqlalchemy.orm import deferred
 
 from app.core.db import PreBaseDonationCharity
 
@@ -7,4 +8,12 @@ class Donation(PreBaseDonationCharity):
     user_id = Column(Integer, ForeignKey(
         'user.id', name='fk_donation_user_id_user'
     ))
-    comment = Column(Text)
+    comment = deferred(Column(Text))
+
+
+Index(
+    'ix_donation_user_id_create_date',
+    Donation.user_id,
+    Donation.create_date,
+    Donation.id
+)
@@ -0,0 +1,59 @@
+from sqlalchemy import DDL, Column, ForeignKey, Integer, event
+
+from app.core.db import Base
+
+DONATION_SUMMARY_UPSERT = (
+    'INSERT INTO donationsummary '
+    '(user_id, donated_amount, invested_amount, donations_count) '
+    'SELECT NEW.user_id, NEW.full_amount, '
+    'COALESCE(NEW.invested_amount, 0), 1 '
+    'WHERE NEW.user_id IS NOT NULL '
+    'ON CONFLICT (user_id) DO UPDATE SET '
+    'donated_amount = donated_amount + excluded.donated_amount, '
+    'invested_amount = invested_amount + excluded.invested_amount, '
+    'donations_count = donations_count + 1; '
+)
+DONATION_SUMMARY_SUBTRACT = (
+    'UPDATE donationsummary SET '
+    'donated_amount = donated_amount - OLD.full_amount, '
+    'invested_amount = invested_amount - COALESCE(OLD.invested_amount, 0), '
+    'donations_count = donations_count - 1 '
+    'WHERE user_id = OLD.user_id; '
+)
+DONATION_SUMMARY_TRIGGERS = {
+    'INSERT': DONATION_SUMMARY_UPSERT,
+    'UPDATE OF user_id, full_amount, invested_amount': (
+        DONATION_SUMMARY_SUBTRACT + DONATION_SUMMARY_UPSERT
+    ),
+    'DELETE': DONATION_SUMMARY_SUBTRACT,
+}
+DONATION_SUMMARY_TRIGGER = (
+    'CREATE TRIGGER IF NOT EXISTS donation_{name}_donation_summary '
+    'AFTER {operation} ON donation '
+    'BEGIN {statements}END'
+)
+
+
+class DonationSummary(Base):
+    """Running totals of the donations of a user.
+        They are kept by the database triggers on every write
+        to the donations, so reading them costs a single row.
+    """
+    user_id = Column(Integer, ForeignKey(
+        'user.id', name='fk_donationsummary_user_id_user'
+    ), nullable=False, unique=True)
+    donated_amount = Column(Integer, nullable=False, default=0)
+    invested_amount = Column(Integer, nullable=False, default=0)
+    donations_count = Column(Integer, nullable=False, default=0)
+
+
+for operation, statements in DONATION_SUMMARY_TRIGGERS.items():
+    event.listen(
+        Base.metadata,
+        'after_create',
+        DDL(DONATION_SUMMARY_TRIGGER.format(
+            name=operation.split()[0],
+            operation=operation,
+            statements=statements
+        ))
+    )
@@ -0,0 +1,98 @@
+from sqlalchemy import DDL, Column, Integer, event
+
+from app.core.db import Base
+
+FUND_STATS_ID = 1
+CLOSE_SECONDS = (
+    'CAST(ROUND((julianday({row}.close_date) - '
+    'julianday({row}.create_date)) * 86400) AS INTEGER)'
+)
+FUND_STATS_TERMS = {
+    'charityproject': {
+        'open_projects': 'COALESCE({row}.fully_invested, 0) = 0',
+        'closed_projects': 'COALESCE({row}.fully_invested, 0) = 1',
+        'close_seconds': (
+            'CASE WHEN {row}.fully_invested = 1 '
+            f'THEN COALESCE({CLOSE_SECONDS}, 0) ELSE 0 END'
+        ),
+        'open_projects_amount': (
+            '{row}.full_amount - COALESCE({row}.invested_amount, 0)'
+        ),
+    },
+    'donation': {
+        'donated_amount': '{row}.full_amount',
+        'invested_amount': 'COALESCE({row}.invested_amount, 0)',
+    },
+}
+FUND_STATS_TRIGGERS = {
+    'charityproject': {
+        'INSERT': ('NEW',),
+        'UPDATE OF full_amount, invested_amount, fully_invested, '
+        'create_date, close_date': ('OLD', 'NEW'),
+        'DELETE': ('OLD',),
+    },
+    'donation': {
+        'INSERT': ('NEW',),
+        'UPDATE OF full_amount, invested_amount': ('OLD', 'NEW'),
+        'DELETE': ('OLD',),
+    },
+}
+FUND_STATS_TRIGGER = (
+    'CREATE TRIGGER IF NOT EXISTS {table}_{name}_fund_stats '
+    'AFTER {operation} ON {table} '
+    'BEGIN UPDATE fundstats SET {values} WHERE id = {id}; END'
+)
+
+
+def get_fund_stats_values(table: str, rows) -> str:
+    """Add the terms of the NEW row and subtract the ones of the OLD row."""
+    return ', '.join(
+        f'{column} = {column}' + ''.join(
+            f' {"-" if row == "OLD" else "+"} ({term.format(row=row)})'
+            for row in rows
+        ) for column, term in FUND_STATS_TERMS[table].items()
+    )
+
+
+class FundStats(Base):
+    """Running totals of the whole fund.
+        They are kept by the database triggers on every write
+        to the projects and donations, so the statistics
+        are read from a single row.
+        close_seconds is the sum of the lifetimes of the closed projects.
+        open_projects_amount is the amount the open projects still need.
+    """
+    donated_amount = Column(Integer, nullable=False, default=0)
+    invested_amount = Column(Integer, nullable=False, default=0)
+    open_projects = Column(Integer, nullable=False, default=0)
+    closed_projects = Column(Integer, nullable=False, default=0)
+    close_seconds = Column(Integer, nullable=False, default=0)
+    open_projects_amount = Column(
+        Integer, nullable=False, default=0, server_default='0'
+    )
+
+
+event.listen(
+    FundStats.__table__,
+    'after_create',
+    DDL(
+        'INSERT INTO fundstats (id, donated_amount, invested_amount, '
+        'open_projects, closed_projects, close_seconds, '
+        'open_projects_amount) '
+        f'VALUES ({FUND_STATS_ID}, 0, 0, 0, 0, 0, 0)'
+    )
+)
+
+for table, operations in FUND_STATS_TRIGGERS.items():
+    for operation, rows in operations.items():
+        event.listen(
+            Base.metadata,
+            'after_create',
+            DDL(FUND_STATS_TRIGGER.format(
+                table=table,
+                name=operation.split()[0],
+                operation=operation,
+                values=get_fund_stats_values(table, rows),
+                id=FUND_STATS_ID
+            ))
+        )
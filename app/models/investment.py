@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer
+
+from app.core.db import Base
+
+
+class Investment(Base):
+    """Append-only record of a transfer from a donation to a project."""
+    donation_id = Column(Integer, ForeignKey(
+        'donation.id', name='fk_investment_donation_id_donation'
+    ), nullable=False, index=True)
+    project_id = Column(Integer, ForeignKey(
+        'charityproject.id', name='fk_investment_project_id_charityproject'
+    ), nullable=False, index=True)
+    amount = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
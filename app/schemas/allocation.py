@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class AllocationStatus(BaseModel):
+    id: int
+    allocated: bool
+    invested_amount: int
+    fully_invested: bool
+
+    class Config:
+        orm_mode = True
@@ -1,7 +1,9 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, Extra, PositiveInt
+from pydantic import BaseModel, Extra, PositiveInt, conlist
+
+DONATION_BULK_MAX_SIZE = 10000
 
 
 class DonationBase(BaseModel):
@@ -16,6 +18,11 @@ class DonationCreate(DonationBase):
     full_amount: PositiveInt
 
 
+DonationBulkCreate = conlist(
+    DonationCreate, min_items=1, max_items=DONATION_BULK_MAX_SIZE
+)
+
+
 class DonationDB(DonationCreate):
     id: int
     user_id: Optional[int]
@@ -26,3 +33,10 @@ class DonationDB(DonationCreate):
 
     class Config:
         orm_mode = True
+
+
+class DonationSummaryDB(BaseModel):
+    donated_amount: int = 0
+    invested_amount: int = 0
+    open_amount: int = 0
+    donations_count: int = 0
@@ -0,0 +1,33 @@
+from enum import Enum
+from uuid import UUID
+
+from pydantic import BaseModel, Extra
+
+
+class ExportModel(str, Enum):
+    charity_project = 'charity_project'
+    donation = 'donation'
+
+
+class ExportFormat(str, Enum):
+    csv = 'csv'
+    xlsx = 'xlsx'
+
+
+class ExportStatus(str, Enum):
+    running = 'running'
+    done = 'done'
+    failed = 'failed'
+
+
+class ExportCreate(BaseModel):
+    model: ExportModel
+    format: ExportFormat = ExportFormat.csv
+
+    class Config:
+        extra = Extra.forbid
+
+
+class ExportDB(ExportCreate):
+    id: UUID
+    status: ExportStatus
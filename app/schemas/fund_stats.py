@@ -0,0 +1,18 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class FundStatsDB(BaseModel):
+    donated_amount: int
+    invested_amount: int
+    open_donations_amount: int
+    open_projects_amount: int
+    open_projects: int
+    closed_projects: int
+    average_close_seconds: Optional[float]
+
+
+class FundingGap(BaseModel):
+    open_projects_amount: int
+    open_donations_amount: int
@@ -0,0 +1,14 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class InvestmentDB(BaseModel):
+    id: int
+    donation_id: int
+    project_id: int
+    amount: int
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,156 @@
+import asyncio
+import contextlib
+from typing import List, Tuple
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal, begin_write
+from app.models import Donation
+from app.services.constants import INVESTMENT_MAX_ATTEMPTS
+from app.services.investment import (CONFLICT_ERRORS, invest_batch,
+                                     is_conflict, wait_for_retry)
+
+ALLOCATION_WORKER_STOPPED_ERROR = 'Распределение пожертвований остановлено'
+
+
+class AllocationWorker:
+    """Background allocator of the new donations.
+        Donations are collected into micro-batches
+        of up to `batch_size` items or `batch_timeout` seconds,
+        every batch is inserted, invested and committed at once.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = AsyncSessionLocal,
+        batch_size: int = settings.allocation_batch_size,
+        batch_timeout: float = settings.allocation_batch_timeout
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.queue = None
+        self.task = None
+
+    async def start(self) -> None:
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Allocate the queued donations and stop the worker.
+            The futures of the donations left in the queue,
+            if the worker has failed, get an error,
+            so no request waits for them forever.
+        """
+        drained = asyncio.create_task(self.queue.join())
+        await asyncio.wait(
+            (drained, self.task), return_when=asyncio.FIRST_COMPLETED
+        )
+        drained.cancel()
+        self.task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self.task
+        self.task = None
+        queued = []
+        while not self.queue.empty():
+            queued.append(self.queue.get_nowait())
+        self.reject(queued)
+
+    @staticmethod
+    def reject(batch: List[Tuple[Donation, asyncio.Future]]) -> None:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(
+                    RuntimeError(ALLOCATION_WORKER_STOPPED_ERROR)
+                )
+
+    async def submit(self, donation: Donation) -> Donation:
+        """Queue the donation and wait for its batch to be committed."""
+        if self.task is None:
+            raise RuntimeError(ALLOCATION_WORKER_STOPPED_ERROR)
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((donation, future))
+        return await future
+
+    async def run(self) -> None:
+        while True:
+            batch = await self.collect()
+            try:
+                await self.process(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def collect(self) -> List[Tuple[Donation, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.batch_timeout
+        try:
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self.queue.get(), timeout)
+                    )
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            self.reject(batch)
+            raise
+        return batch
+
+    async def process(
+        self,
+        batch: List[Tuple[Donation, asyncio.Future]]
+    ) -> None:
+        try:
+            donations = await self.allocate(
+                [donation for donation, _ in batch]
+            )
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, future), donation in zip(batch, donations):
+            if not future.done():
+                future.set_result(donation)
+
+    async def allocate(self, donations: List[Donation]) -> List[Donation]:
+        """Insert and invest the donations in one transaction.
+            The whole batch is repeated if a concurrent writer
+            has changed any of the invested projects
+            or has held the database lock for too long.
+        """
+        for attempt in range(1, INVESTMENT_MAX_ATTEMPTS + 1):
+            async with self.session_factory(
+                expire_on_commit=False
+            ) as session:
+                session.add_all(donations)
+                try:
+                    await begin_write(session)
+                    await session.flush()
+                    await invest_batch(donations, session)
+                    await session.commit()
+                    return donations
+                except CONFLICT_ERRORS as error:
+                    await session.rollback()
+                    if (
+                        attempt == INVESTMENT_MAX_ATTEMPTS or
+                        not is_conflict(error)
+                    ):
+                        raise
+            await wait_for_retry(attempt)
+            donations = [
+                Donation(
+                    full_amount=donation.full_amount,
+                    comment=donation.comment,
+                    user_id=donation.user_id
+                ) for donation in donations
+            ]
+
+
+allocation_worker = AllocationWorker()
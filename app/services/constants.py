@@ -1,2 +1,5 @@
 MIN_PASSWORD_LENGTH = 3
-JWT_TOKEN_LIFETIME = 3600
\ No newline at end of file
+JWT_TOKEN_LIFETIME = 3600
+INVESTMENT_CHUNK_SIZE = 100
+INVESTMENT_MAX_ATTEMPTS = 5
+INVESTMENT_RETRY_DELAY = 0.01
\ No newline at end of file
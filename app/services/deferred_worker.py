@@ -0,0 +1,148 @@
+import asyncio
+import contextlib
+import logging
+from typing import Optional, Union
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql.expression import false
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal, begin_write
+from app.crud.base import CRUDBase
+from app.models import CharityProject, Donation, User
+from app.schemas.charity_project import CharityProjectCreate
+from app.schemas.donation import DonationCreate
+from app.services.constants import INVESTMENT_MAX_ATTEMPTS
+from app.services.investment import (CONFLICT_ERRORS, INVESTMENT_ENGINES,
+                                     is_conflict, wait_for_retry)
+
+DEFERRED_ALLOCATION_ERROR = 'Ошибка отложенного распределения, повтор позже'
+
+logger = logging.getLogger(__name__)
+
+
+async def get_pending_object(
+    session: AsyncSession
+) -> Optional[Union[CharityProject, Donation]]:
+    """The earliest object of both models that is not allocated yet."""
+    pending_objects = []
+    for model in (CharityProject, Donation):
+        db_object = await session.execute(
+            select(model).where(
+                model.allocated == false()
+            ).order_by(
+                model.create_date, model.id
+            ).limit(1)
+        )
+        db_object = db_object.scalars().first()
+        if db_object is not None:
+            pending_objects.append(db_object)
+    return min(
+        pending_objects,
+        key=lambda db_object: db_object.create_date,
+        default=None
+    )
+
+
+class DeferredAllocationWorker:
+    """Background allocator of the objects saved in the deferred mode.
+        Pending objects are read from the database in FIFO order,
+        so the ones saved by other processes or before a restart
+        are allocated as well.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = AsyncSessionLocal,
+        poll_interval: float = settings.allocation_poll_interval
+    ):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.wakeup = None
+        self.task = None
+
+    async def start(self) -> None:
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        self.task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self.task
+        self.task = None
+
+    def notify(self) -> None:
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    async def defer(
+        self,
+        object_in: Union[CharityProjectCreate, DonationCreate],
+        crud: CRUDBase,
+        session: AsyncSession,
+        user: Optional[User] = None
+    ) -> Union[CharityProject, Donation]:
+        """Save the object as pending and wake the worker up.
+            The object is detached before the commit,
+            so the response is built from its state in memory.
+        """
+        db_object = crud.build(object_in, user)
+        db_object.allocated = False
+        session.add(db_object)
+        await session.flush()
+        session.expunge(db_object)
+        await session.commit()
+        self.notify()
+        return db_object
+
+    async def run(self) -> None:
+        """Allocate the pending objects on every wakeup and poll.
+            An error of a pass is logged and the worker backs off,
+            the objects left pending are taken by a later pass.
+        """
+        failures = 0
+        while True:
+            self.wakeup.clear()
+            try:
+                await self.allocate_pending()
+                failures = 0
+            except Exception:
+                logger.exception(DEFERRED_ALLOCATION_ERROR)
+                failures = min(failures + 1, INVESTMENT_MAX_ATTEMPTS)
+                await wait_for_retry(failures)
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.wakeup.wait(), self.poll_interval)
+
+    async def allocate_pending(self) -> int:
+        """Allocate the pending objects one by one until none is left.
+            On a conflict the pending object is read again,
+            so a concurrent worker may have allocated it meanwhile.
+            Returns the number of objects allocated by this worker.
+        """
+        invest = INVESTMENT_ENGINES[settings.investment_engine]
+        allocated = 0
+        attempt = 0
+        while True:
+            async with self.session_factory() as session:
+                try:
+                    await begin_write(session)
+                    db_object = await get_pending_object(session)
+                    if db_object is None:
+                        return allocated
+                    db_object.allocated = True
+                    await invest(db_object, session)
+                    await session.commit()
+                except CONFLICT_ERRORS as error:
+                    await session.rollback()
+                    if not is_conflict(error):
+                        raise
+                    attempt = min(attempt + 1, INVESTMENT_MAX_ATTEMPTS)
+                    await wait_for_retry(attempt)
+                    continue
+            allocated += 1
+            attempt = 0
+
+
+deferred_worker = DeferredAllocationWorker()
@@ -0,0 +1,175 @@
+import asyncio
+import csv
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from openpyxl import Workbook
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.db import ReadSessionLocal
+from app.models import CharityProject, Donation
+from app.schemas.export import (ExportCreate, ExportDB, ExportFormat,
+                                ExportModel, ExportStatus)
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_COLUMNS = {
+    ExportModel.charity_project: (
+        CharityProject.id,
+        CharityProject.name,
+        CharityProject.description,
+        CharityProject.full_amount,
+        CharityProject.invested_amount,
+        CharityProject.fully_invested,
+        CharityProject.create_date,
+        CharityProject.close_date,
+    ),
+    ExportModel.donation: (
+        Donation.id,
+        Donation.user_id,
+        Donation.comment,
+        Donation.full_amount,
+        Donation.invested_amount,
+        Donation.fully_invested,
+        Donation.create_date,
+        Donation.close_date,
+    ),
+}
+EXPORT_STATES = {
+    'part': ExportStatus.running,
+    'error': ExportStatus.failed,
+}
+
+
+async def stream_chunks(
+    model: ExportModel,
+    session: AsyncSession
+) -> AsyncIterator[List[Row]]:
+    """Rows of the model fetched from the cursor in chunks."""
+    columns = EXPORT_COLUMNS[model]
+    result = await session.stream(
+        select(*columns).order_by(
+            columns[0]
+        ).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+    async for partition in result.partitions():
+        yield partition
+
+
+class CsvWriter:
+
+    def __init__(self, path: Path, header: List[str]):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(header)
+
+    def write(self, rows: List[Row]) -> None:
+        self.writer.writerows(rows)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class XlsxWriter:
+    """The write-only workbook keeps the rows in a temporary file,
+        not in memory.
+    """
+
+    def __init__(self, path: Path, header: List[str]):
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.worksheet = self.workbook.create_sheet()
+        self.worksheet.append(header)
+
+    def write(self, rows: List[Row]) -> None:
+        for row in rows:
+            self.worksheet.append(tuple(row))
+
+    def close(self) -> None:
+        self.workbook.save(self.path)
+
+
+EXPORT_WRITERS = {
+    ExportFormat.csv: CsvWriter,
+    ExportFormat.xlsx: XlsxWriter,
+}
+
+
+class Exporter:
+    """Background writer of the accounting exports.
+        The state of an export is kept in the name of its file:
+        `<id>.<model>.<format>` with the .part suffix while it is written
+        and the .error suffix if it has failed.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = ReadSessionLocal,
+        directory: str = settings.export_dir
+    ):
+        self.session_factory = session_factory
+        self.directory = Path(directory)
+        self.executor = ThreadPoolExecutor(thread_name_prefix='export')
+        self.tasks = set()
+
+    def get_path(self, export_id: UUID, export_in: ExportCreate) -> Path:
+        return self.directory / '.'.join(
+            (export_id.hex, export_in.model.value, export_in.format.value)
+        )
+
+    def start(self, export_in: ExportCreate) -> ExportDB:
+        export_id = uuid4()
+        path = self.get_path(export_id, export_in)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path.with_name(f'{path.name}.part').touch()
+        task = asyncio.create_task(self.export(export_in, path))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return ExportDB(
+            id=export_id, status=ExportStatus.running, **export_in.dict()
+        )
+
+    async def export(self, export_in: ExportCreate, path: Path) -> None:
+        """Stream the rows and write the file in the export thread.
+            The event loop only fetches the chunks and hands them over,
+            so a large export does not stall the requests.
+        """
+        loop = asyncio.get_running_loop()
+        running_path = path.with_name(f'{path.name}.part')
+        try:
+            writer = await loop.run_in_executor(
+                self.executor,
+                EXPORT_WRITERS[export_in.format],
+                running_path,
+                [column.name for column in EXPORT_COLUMNS[export_in.model]]
+            )
+            try:
+                async with self.session_factory() as session:
+                    async for rows in stream_chunks(export_in.model, session):
+                        await loop.run_in_executor(
+                            self.executor, writer.write, rows
+                        )
+            finally:
+                await loop.run_in_executor(self.executor, writer.close)
+        except Exception:
+            running_path.rename(path.with_name(f'{path.name}.error'))
+            raise
+        running_path.rename(path)
+
+    def get(self, export_id: UUID) -> Optional[Tuple[ExportDB, Path]]:
+        """The export and the path of its file, if there is one."""
+        for path in self.directory.glob(f'{export_id.hex}.*'):
+            _, model, file_format, *state = path.name.split('.')
+            status = EXPORT_STATES[state[0]] if state else ExportStatus.done
+            return ExportDB(
+                id=export_id, model=model, format=file_format, status=status
+            ), path
+        return None
+
+
+exporter = Exporter()
@@ -0,0 +1,62 @@
+"""Recount of the fund-wide statistics.
+
+Usage:
+    python -m app.services.fund_stats [--dry-run]
+
+The totals kept by the triggers are recounted from the projects
+and donations, and every total that has drifted is reported.
+"""
+import argparse
+import asyncio
+from typing import Dict, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import AsyncSessionLocal
+from app.crud.data_version import data_version_crud
+from app.crud.fund_stats import fund_stats_crud
+
+FUND_STATS_CONSISTENT = 'Статистика фонда совпадает с данными'
+FUND_STATS_DRIFT = '{name}: {kept} вместо {actual}'
+
+
+async def rebuild_fund_stats(
+    session: AsyncSession,
+    dry_run: bool = False
+) -> Dict[str, Tuple]:
+    """Recount the statistics.
+        Returns the kept and the actual value of every drifted total.
+    """
+    await data_version_crud.lock(session)
+    kept = await fund_stats_crud.get_raw_stats(session)
+    await fund_stats_crud.rebuild(session)
+    actual = await fund_stats_crud.get_raw_stats(session)
+    if dry_run:
+        await session.rollback()
+    else:
+        await session.commit()
+    return {
+        name: (kept_value, actual_value)
+        for name, kept_value, actual_value in zip(
+            actual._fields, kept, actual
+        ) if kept_value != actual_value
+    }
+
+
+async def main(dry_run: bool) -> None:
+    async with AsyncSessionLocal() as session:
+        drift = await rebuild_fund_stats(session, dry_run)
+    if not drift:
+        print(FUND_STATS_CONSISTENT)
+    for name, (kept, actual) in drift.items():
+        print(FUND_STATS_DRIFT.format(name=name, kept=kept, actual=actual))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='only report the drifted totals'
+    )
+    asyncio.run(main(parser.parse_args().dry_run))
@@ -1,27 +1,125 @@
+import asyncio
+import random
 from datetime import datetime
-from typing import List, Union
+from typing import AsyncIterator, Dict, List, Optional, Type, Union
 
-from sqlalchemy import select
+from sqlalchemy import (DateTime, Integer, bindparam, func, select, tuple_,
+                        update)
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.sql.expression import false
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.expression import false, true
 
-from app.models import CharityProject, Donation
+from app.core.config import settings
+from app.core.db import begin_write
+from app.crud.base import CRUDBase
+from app.crud.data_version import data_version_crud
+from app.crud.donation import donation_crud
+from app.crud.fund_stats import fund_stats_crud
+from app.crud.investment import investment_crud
+from app.models import CharityProject, Donation, User
+from app.schemas.charity_project import CharityProjectCreate
+from app.schemas.donation import DonationCreate
+from app.services.constants import (INVESTMENT_CHUNK_SIZE,
+                                    INVESTMENT_MAX_ATTEMPTS,
+                                    INVESTMENT_RETRY_DELAY)
+from app.services.open_pool import OPEN_POOL_CHANGED, open_pool
+
+INVESTMENT_CONFLICT_ERROR = 'Строки таблицы {} изменены параллельно'
+DATABASE_LOCKED_ERROR = 'database is locked'
+CONFLICT_ERRORS = (StaleDataError, OperationalError)
+
+
+def select_not_invested(
+    model: Union[Type[CharityProject], Type[Donation]],
+    after_key: bool
+) -> Select:
+    query = select(
+        model
+    ).where(
+        model.fully_invested == false(),
+        model.allocated == true()
+    )
+    if after_key:
+        query = query.where(
+            tuple_(model.create_date, model.id) > tuple_(
+                bindparam('create_date', type_=DateTime()),
+                bindparam('object_id', type_=Integer())
+            )
+        )
+    return query.order_by(
+        model.create_date, model.id
+    ).limit(bindparam('chunk_size'))
+
+
+def select_open_running_totals(
+    model: Union[Type[CharityProject], Type[Donation]]
+) -> Select:
+    """Open objects with the running sum of their remaining amounts
+        up to the one which exhausts the available amount.
+    """
+    open_objects = select(
+        model.id,
+        model.version,
+        model.remaining_amount.label('need_to_invest'),
+        func.sum(model.remaining_amount).over(
+            order_by=(model.create_date, model.id)
+        ).label('running_total')
+    ).where(
+        model.fully_invested == false(),
+        model.allocated == true()
+    ).subquery()
+    return select(
+        open_objects.c.id,
+        open_objects.c.version,
+        open_objects.c.need_to_invest,
+        open_objects.c.running_total
+    ).where(
+        open_objects.c.running_total - open_objects.c.need_to_invest <
+        bindparam('available_amount')
+    ).order_by(
+        open_objects.c.running_total
+    )
+
+
+# The allocation statements are built once per model,
+# so a call only binds the parameters.
+SELECT_NOT_INVESTED = {
+    (model, after_key): select_not_invested(model, after_key)
+    for model in (CharityProject, Donation) for after_key in (False, True)
+}
+SELECT_OPEN_RUNNING_TOTALS = {
+    model: select_open_running_totals(model)
+    for model in (CharityProject, Donation)
+}
 
 
 async def get_not_invested_objects(
     model_in: Union[CharityProject, Donation],
-    session: AsyncSession
-) -> List[Union[CharityProject, Donation]]:
-    db_objects = await session.execute(
-        select(
-            model_in
-        ).where(
-            model_in.fully_invested == false()
-        ).order_by(
-            model_in.create_date
+    session: AsyncSession,
+    chunk_size: int = INVESTMENT_CHUNK_SIZE
+) -> AsyncIterator[Union[CharityProject, Donation]]:
+    """Iterate over the open objects in FIFO order.
+        Rows are fetched in chunks with a keyset cursor
+        over (create_date, id), so the caller can stop
+        as soon as it needs no more objects.
+    """
+    parameters = {'chunk_size': chunk_size}
+    after_key = False
+    while True:
+        db_objects = await session.execute(
+            SELECT_NOT_INVESTED[model_in, after_key], parameters
         )
-    )
-    return db_objects.scalars().all()
+        chunk = db_objects.scalars().all()
+        for db_object in chunk:
+            yield db_object
+        if len(chunk) < chunk_size:
+            return
+        parameters.update(
+            create_date=chunk[-1].create_date, object_id=chunk[-1].id
+        )
+        after_key = True
 
 
 async def close_invested_object(
@@ -31,31 +129,378 @@ async def close_invested_object(
     obj_to_close.close_date = datetime.now()
 
 
-async def execute_investment_process(
+def get_counterpart_model(
+    object_in: Union[CharityProject, Donation]
+) -> Union[Type[CharityProject], Type[Donation]]:
+    return CharityProject if isinstance(object_in, Donation) else Donation
+
+
+def get_investment(
+    object_in: Union[CharityProject, Donation],
+    counterpart_id: int,
+    amount: int
+) -> Dict[str, int]:
+    if isinstance(object_in, Donation):
+        return dict(
+            donation_id=object_in.id, project_id=counterpart_id, amount=amount
+        )
+    return dict(
+        donation_id=counterpart_id, project_id=object_in.id, amount=amount
+    )
+
+
+async def has_open_counterparts(
     object_in: Union[CharityProject, Donation],
     session: AsyncSession
-):
-    db_model = (
-        CharityProject if isinstance(object_in, Donation) else Donation
+) -> bool:
+    """Whether any open object may take the amount of object_in.
+        The totals are kept by the database in the same transaction
+        as every write, so one row read replaces the search.
+    """
+    open_amounts = await fund_stats_crud.get_open_amounts(session)
+    if isinstance(object_in, Donation):
+        return open_amounts.open_projects_amount > 0
+    return open_amounts.open_donations_amount > 0
+
+
+async def invest_with_orm(
+    object_in: Union[CharityProject, Donation],
+    session: AsyncSession
+) -> int:
+    """Distribute the object amount walking the open ORM objects.
+        Returns the invested amount.
+    """
+    available_amount = object_in.full_amount - object_in.invested_amount
+    invested_amount = 0
+    investments = []
+
+    async for not_invested_obj in get_not_invested_objects(
+        get_counterpart_model(object_in), session
+    ):
+        need_to_invest = not_invested_obj.full_amount - not_invested_obj.invested_amount
+        to_invest = (
+            need_to_invest if need_to_invest < available_amount else available_amount
+        )
+        not_invested_obj.invested_amount += to_invest
+        object_in.invested_amount += to_invest
+        available_amount -= to_invest
+        invested_amount += to_invest
+        if to_invest:
+            investments.append(
+                get_investment(object_in, not_invested_obj.id, to_invest)
+            )
+
+        if not_invested_obj.full_amount == not_invested_obj.invested_amount:
+            await close_invested_object(not_invested_obj)
+
+        if not available_amount:
+            await close_invested_object(object_in)
+            break
+    await investment_crud.create_multiple(investments, session)
+    return invested_amount
+
+
+async def invest_with_sql(
+    object_in: Union[CharityProject, Donation],
+    session: AsyncSession
+) -> int:
+    """Distribute the object amount with set-based statements.
+        A running sum over the open rows finds the objects to invest in,
+        all of them but the last one are closed by a single UPDATE.
+        The updates are conditional on the row versions,
+        StaleDataError is raised if any row was changed meanwhile.
+        Returns the invested amount.
+    """
+    db_model = get_counterpart_model(object_in)
+    available_amount = object_in.full_amount - object_in.invested_amount
+    invested_objects = await session.execute(
+        SELECT_OPEN_RUNNING_TOTALS[db_model],
+        {'available_amount': available_amount}
+    )
+    invested_objects = invested_objects.all()
+    if not invested_objects:
+        return 0
+
+    closed_objects = [
+        (db_object.id, db_object.version) for db_object in invested_objects
+        if db_object.running_total <= available_amount
+    ]
+    investments = [
+        get_investment(object_in, db_object.id, db_object.need_to_invest)
+        for db_object in invested_objects
+        if db_object.running_total <= available_amount
+    ]
+    if closed_objects:
+        closed = await session.execute(
+            update(db_model).where(
+                tuple_(db_model.id, db_model.version).in_(closed_objects)
+            ).values(
+                invested_amount=db_model.full_amount,
+                fully_invested=True,
+                close_date=datetime.now(),
+                version=db_model.version + 1
+            ).execution_options(synchronize_session=False)
+        )
+        if closed.rowcount != len(closed_objects):
+            raise StaleDataError(
+                INVESTMENT_CONFLICT_ERROR.format(db_model.__tablename__)
+            )
+
+    last_invested = invested_objects[-1]
+    if last_invested.running_total > available_amount:
+        to_invest = (
+            available_amount - last_invested.running_total +
+            last_invested.need_to_invest
+        )
+        investments.append(
+            get_investment(object_in, last_invested.id, to_invest)
+        )
+        invested = await session.execute(
+            update(db_model).where(
+                db_model.id == last_invested.id,
+                db_model.version == last_invested.version
+            ).values(
+                invested_amount=db_model.invested_amount + to_invest,
+                version=db_model.version + 1
+            ).execution_options(synchronize_session=False)
+        )
+        if invested.rowcount != 1:
+            raise StaleDataError(
+                INVESTMENT_CONFLICT_ERROR.format(db_model.__tablename__)
+            )
+        invested_amount = available_amount
+    else:
+        invested_amount = last_invested.running_total
+
+    object_in.invested_amount += invested_amount
+    if invested_amount == available_amount:
+        await close_invested_object(object_in)
+    await investment_crud.create_multiple(investments, session)
+    return invested_amount
+
+
+async def invest_with_open_pool(
+    object_in: Union[CharityProject, Donation],
+    session: AsyncSession
+) -> int:
+    """Distribute the object amount using the in-process open pool.
+        Only the rows which are actually invested are touched.
+        The pool is changed right away and dropped
+        if the transaction is not committed.
+        Returns the invested amount.
+    """
+    await data_version_crud.lock(session)
+    await open_pool.sync(object_in, session)
+    session.info[OPEN_POOL_CHANGED] = True
+
+    db_model = get_counterpart_model(object_in)
+    open_entries = open_pool.entries[db_model]
+    available_amount = object_in.full_amount - object_in.invested_amount
+    closed_ids = []
+    investments = []
+    partial_entry = None
+    for entry in open_entries.values():
+        if entry.remaining > available_amount:
+            partial_entry = entry
+            break
+        closed_ids.append(entry.id)
+        investments.append(
+            get_investment(object_in, entry.id, entry.remaining)
+        )
+        available_amount -= entry.remaining
+        if not available_amount:
+            break
+    invested_amount = (
+        object_in.full_amount - object_in.invested_amount -
+        (0 if partial_entry else available_amount)
     )
-    not_invested_objects = await get_not_invested_objects(db_model, session)
-    available_amount = object_in.full_amount
-
-    if not_invested_objects:
-        for not_invested_obj in not_invested_objects:
-            need_to_invest = not_invested_obj.full_amount - not_invested_obj.invested_amount
-            to_invest = (
-                need_to_invest if need_to_invest < available_amount else available_amount
+
+    if closed_ids:
+        await session.execute(
+            update(db_model).where(
+                db_model.id.in_(closed_ids)
+            ).values(
+                invested_amount=db_model.full_amount,
+                fully_invested=True,
+                close_date=datetime.now(),
+                version=db_model.version + 1
+            ).execution_options(synchronize_session=False)
+        )
+        for _ in closed_ids:
+            open_entries.popitem(last=False)
+    if partial_entry:
+        await session.execute(
+            update(db_model).where(
+                db_model.id == partial_entry.id
+            ).values(
+                invested_amount=db_model.invested_amount + available_amount,
+                version=db_model.version + 1
+            ).execution_options(synchronize_session=False)
+        )
+        partial_entry.remaining -= available_amount
+        investments.append(
+            get_investment(object_in, partial_entry.id, available_amount)
+        )
+
+    if invested_amount:
+        object_in.invested_amount += invested_amount
+        if object_in.invested_amount == object_in.full_amount:
+            await close_invested_object(object_in)
+        await investment_crud.create_multiple(investments, session)
+        await session.flush()
+        open_pool.version = await data_version_crud.get_version(session)
+    open_pool.register(object_in)
+    return invested_amount
+
+
+async def invest_batch(
+    objects_in: List[Union[CharityProject, Donation]],
+    session: AsyncSession
+) -> None:
+    """Distribute the amounts of several new objects of one model.
+        The objects are taken in the given order and merged
+        with the open counterpart objects in a single FIFO pass.
+    """
+    objects_in = iter(objects_in)
+    object_in = next(objects_in, None)
+    if object_in is None:
+        return
+    investments = []
+
+    async for not_invested_obj in get_not_invested_objects(
+        get_counterpart_model(object_in), session
+    ):
+        while object_in is not None:
+            to_invest = min(
+                not_invested_obj.full_amount - not_invested_obj.invested_amount,
+                object_in.full_amount - object_in.invested_amount
             )
             not_invested_obj.invested_amount += to_invest
             object_in.invested_amount += to_invest
-            available_amount -= to_invest
+            if to_invest:
+                investments.append(
+                    get_investment(object_in, not_invested_obj.id, to_invest)
+                )
+
+            if object_in.full_amount == object_in.invested_amount:
+                await close_invested_object(object_in)
+                object_in = next(objects_in, None)
 
             if not_invested_obj.full_amount == not_invested_obj.invested_amount:
                 await close_invested_object(not_invested_obj)
-
-            if not available_amount:
-                await close_invested_object(object_in)
                 break
-        await session.commit()
-    return object_in
+
+        if object_in is None:
+            break
+    await investment_crud.create_multiple(investments, session)
+
+
+INVESTMENT_ENGINES = {
+    'orm': invest_with_orm,
+    'sql': invest_with_sql,
+    'pool': invest_with_open_pool,
+}
+
+
+def is_conflict(error: Exception) -> bool:
+    """Whether the transaction may succeed if it is repeated.
+        SQLite reports a writer of another process holding the lock
+        past busy_timeout as an OperationalError.
+    """
+    return (
+        isinstance(error, StaleDataError) or
+        DATABASE_LOCKED_ERROR in str(getattr(error, 'orig', error))
+    )
+
+
+async def wait_for_retry(attempt: int) -> None:
+    await asyncio.sleep(
+        random.uniform(0, INVESTMENT_RETRY_DELAY * 2 ** attempt)
+    )
+
+
+async def execute_bulk_investment_process(
+    donations_in: List[DonationCreate],
+    session: AsyncSession,
+    user: User
+) -> List[Donation]:
+    """Create the donations and invest them in one transaction.
+        The new donations are detached before the commit,
+        so they keep their state for the response.
+    """
+    for attempt in range(1, INVESTMENT_MAX_ATTEMPTS + 1):
+        try:
+            donations = await donation_crud.create_multiple(
+                donations_in, session, user
+            )
+            await invest_batch(donations, session)
+            await session.flush()
+            for donation in donations:
+                session.expunge(donation)
+            await session.commit()
+            return donations
+        except CONFLICT_ERRORS as error:
+            await session.rollback()
+            session.expunge_all()
+            if attempt == INVESTMENT_MAX_ATTEMPTS or not is_conflict(error):
+                raise
+        await wait_for_retry(attempt)
+
+
+async def execute_create_investment_process(
+    object_in: Union[CharityProjectCreate, DonationCreate],
+    crud: CRUDBase,
+    session: AsyncSession,
+    user: Optional[User] = None
+) -> Union[CharityProject, Donation]:
+    """Create the object and invest it in one transaction.
+        The object is detached before the only commit,
+        so the response is built from its state in memory.
+    """
+    invest = INVESTMENT_ENGINES[settings.investment_engine]
+    for attempt in range(1, INVESTMENT_MAX_ATTEMPTS + 1):
+        try:
+            await begin_write(session)
+            db_object = crud.build(object_in, user)
+            session.add(db_object)
+            await session.flush()
+            if await has_open_counterparts(db_object, session):
+                await invest(db_object, session)
+                await session.flush()
+            session.expunge(db_object)
+            await session.commit()
+            return db_object
+        except CONFLICT_ERRORS as error:
+            await session.rollback()
+            session.expunge_all()
+            if attempt == INVESTMENT_MAX_ATTEMPTS or not is_conflict(error):
+                raise
+        await wait_for_retry(attempt)
+
+
+async def execute_investment_process(
+    object_in: Union[CharityProject, Donation],
+    session: AsyncSession
+):
+    """Invest the object and commit.
+        Nothing is done when no open object may take the amount.
+        The investment is repeated with a growing random delay
+        if a concurrent writer has changed any of the invested rows
+        or has held the database lock for too long.
+    """
+    invest = INVESTMENT_ENGINES[settings.investment_engine]
+    for attempt in range(1, INVESTMENT_MAX_ATTEMPTS + 1):
+        try:
+            await begin_write(session)
+            if not await has_open_counterparts(object_in, session):
+                return object_in
+            await invest(object_in, session)
+            await session.commit()
+            return object_in
+        except CONFLICT_ERRORS as error:
+            await session.rollback()
+            if attempt == INVESTMENT_MAX_ATTEMPTS or not is_conflict(error):
+                raise
+        await wait_for_retry(attempt)
+        await begin_write(session)
+        await session.refresh(object_in)
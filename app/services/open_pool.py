@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Union
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import false, true
+
+from app.core.db import AsyncSessionLocal
+from app.crud.data_version import data_version_crud
+from app.models import CharityProject, Donation
+
+OPEN_POOL_CHANGED = 'open_pool_changed'
+
+
+class OpenEntry:
+    __slots__ = ('id', 'create_date', 'remaining')
+
+    def __init__(self, id: int, create_date: datetime, remaining: int):
+        self.id = id
+        self.create_date = create_date
+        self.remaining = remaining
+
+
+class OpenPool:
+    """Per-process ledger of the open projects and donations.
+        Open objects are kept with their remaining amount
+        in FIFO order, so the allocator reads nothing from the tables.
+        The pool is rebuilt from the database whenever the data version
+        shows a write the pool does not know about.
+    """
+
+    def __init__(self):
+        self.entries = {
+            CharityProject: OrderedDict(),
+            Donation: OrderedDict(),
+        }
+        self.version: Optional[int] = None
+
+    async def rebuild(self, session: AsyncSession) -> None:
+        version = await data_version_crud.get_version(session)
+        entries = {}
+        for model in self.entries:
+            db_objects = await session.execute(
+                select(
+                    model.id,
+                    model.create_date,
+                    model.remaining_amount
+                ).where(
+                    model.fully_invested == false(),
+                    model.allocated == true()
+                ).order_by(
+                    model.create_date, model.id
+                )
+            )
+            entries[model] = OrderedDict(
+                (row[0], OpenEntry(*row)) for row in db_objects
+            )
+        self.entries = entries
+        self.version = version
+
+    async def sync(
+        self,
+        object_in: Union[CharityProject, Donation],
+        session: AsyncSession
+    ) -> None:
+        """Rebuild the pool if it has missed any write.
+            The only unknown write allowed is the insert of object_in.
+        """
+        version = await data_version_crud.get_version(session)
+        if self.version is None:
+            is_actual = False
+        elif object_in.id in self.entries[type(object_in)]:
+            is_actual = version == self.version
+        else:
+            is_actual = version == self.version + 1
+        if is_actual:
+            self.version = version
+        else:
+            await self.rebuild(session)
+
+    def register(self, object_in: Union[CharityProject, Donation]) -> None:
+        """Put the object to the pool or drop it from there."""
+        entries = self.entries[type(object_in)]
+        remaining = object_in.full_amount - object_in.invested_amount
+        if object_in.id in entries:
+            if remaining:
+                entries[object_in.id].remaining = remaining
+            else:
+                del entries[object_in.id]
+        elif remaining:
+            if entries and (
+                next(reversed(entries.values())).create_date >
+                object_in.create_date
+            ):
+                self.version = None
+                return
+            entries[object_in.id] = OpenEntry(
+                object_in.id, object_in.create_date, remaining
+            )
+
+
+open_pool = OpenPool()
+
+
+async def rebuild_open_pool() -> None:
+    async with AsyncSessionLocal() as session:
+        await open_pool.rebuild(session)
+
+
+@event.listens_for(Session, 'after_commit')
+def keep_open_pool(session: Session) -> None:
+    session.info.pop(OPEN_POOL_CHANGED, None)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def drop_uncommitted_open_pool(session: Session, transaction) -> None:
+    if transaction.parent is None and session.info.pop(
+        OPEN_POOL_CHANGED, None
+    ):
+        open_pool.version = None
@@ -0,0 +1,212 @@
+"""Offline re-allocation of all the donations and projects.
+
+Usage:
+    python -m app.services.replay [--dry-run]
+
+Both FIFO streams are merged at once with cumulative sums:
+the n-th rouble of the donations goes to the project
+which holds the n-th rouble of the required amounts.
+"""
+import argparse
+import asyncio
+from typing import List, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import AsyncSessionLocal
+from app.crud.data_version import data_version_crud
+from app.models import CharityProject, Donation, Investment
+
+REPLAY_CHUNK_SIZE = 10000
+REPLAY_REPORT = (
+    'Пересчитано пожертвований: {donations}, проектов: {projects}, '
+    'записей журнала инвестиций: {investments}'
+)
+
+
+class FIFOStream:
+    """Columns of the objects of one model in FIFO order."""
+
+    def __init__(self, rows: List[Tuple]):
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.full_amounts = np.array(
+            [row[1] for row in rows], dtype=np.int64
+        )
+        self.invested_amounts = np.array(
+            [row[2] or 0 for row in rows], dtype=np.int64
+        )
+        self.fully_invested = np.array(
+            [bool(row[3]) for row in rows], dtype=bool
+        )
+        self.create_dates = np.array(
+            [row[4] for row in rows], dtype='datetime64[us]'
+        )
+        self.ends = np.cumsum(self.full_amounts)
+
+    @property
+    def total(self) -> int:
+        return int(self.ends[-1]) if len(self.ends) else 0
+
+    def get_invested_amounts(self, total: int) -> np.ndarray:
+        return np.diff(np.minimum(self.ends, total), prepend=0)
+
+    def get_close_dates(
+        self,
+        closed: np.ndarray,
+        counterpart: 'FIFOStream'
+    ) -> np.ndarray:
+        """The object is closed by the counterpart holding its last rouble,
+            but not earlier than the object itself was created.
+        """
+        counterpart_index = np.searchsorted(
+            counterpart.ends, self.ends[closed] - 1, side='right'
+        )
+        return np.maximum(
+            self.create_dates[closed],
+            counterpart.create_dates[counterpart_index]
+        )
+
+
+async def load_stream(model, session: AsyncSession) -> FIFOStream:
+    db_objects = await session.execute(
+        select(
+            model.id,
+            model.full_amount,
+            model.invested_amount,
+            model.fully_invested,
+            model.create_date
+        ).order_by(
+            model.create_date, model.id
+        )
+    )
+    return FIFOStream(db_objects.all())
+
+
+def get_changes(stream: FIFOStream, counterpart: FIFOStream) -> List[dict]:
+    """Rows with the wrong invested amount or state.
+        The close date of the untouched rows is kept.
+    """
+    invested_amounts = stream.get_invested_amounts(
+        min(stream.total, counterpart.total)
+    )
+    closed = invested_amounts == stream.full_amounts
+    close_dates = np.full(len(stream.ids), None, dtype=object)
+    close_dates[closed] = stream.get_close_dates(
+        closed, counterpart
+    ).astype(object)
+    changed = np.flatnonzero(
+        (invested_amounts != stream.invested_amounts) |
+        (closed != stream.fully_invested)
+    )
+    return [
+        {
+            'b_id': object_id,
+            'b_invested_amount': invested_amount,
+            'b_fully_invested': fully_invested,
+            'b_close_date': close_date,
+        } for object_id, invested_amount, fully_invested, close_date in zip(
+            stream.ids[changed].tolist(),
+            invested_amounts[changed].tolist(),
+            closed[changed].tolist(),
+            close_dates[changed].tolist()
+        )
+    ]
+
+
+def get_investments(
+    donations: FIFOStream,
+    projects: FIFOStream
+) -> List[dict]:
+    """Split the merged streams into the transfers of the ledger."""
+    total = min(donations.total, projects.total)
+    if not total:
+        return []
+    bounds = np.union1d(donations.ends, projects.ends)
+    bounds = bounds[bounds <= total]
+    starts = np.concatenate(([0], bounds[:-1]))
+    donation_index = np.searchsorted(donations.ends, starts, side='right')
+    project_index = np.searchsorted(projects.ends, starts, side='right')
+    created_at = np.maximum(
+        donations.create_dates[donation_index],
+        projects.create_dates[project_index]
+    )
+    return [
+        {
+            'donation_id': donation_id,
+            'project_id': project_id,
+            'amount': amount,
+            'created_at': created,
+        } for donation_id, project_id, amount, created in zip(
+            donations.ids[donation_index].tolist(),
+            projects.ids[project_index].tolist(),
+            (bounds - starts).tolist(),
+            created_at.astype(object).tolist()
+        )
+    ]
+
+
+async def write_changes(model, changes: List[dict], session: AsyncSession):
+    statement = model.__table__.update().where(
+        model.__table__.c.id == bindparam('b_id')
+    ).values(
+        invested_amount=bindparam('b_invested_amount'),
+        fully_invested=bindparam('b_fully_invested'),
+        close_date=bindparam('b_close_date'),
+        version=model.__table__.c.version + 1
+    )
+    for start in range(0, len(changes), REPLAY_CHUNK_SIZE):
+        await session.execute(
+            statement, changes[start:start + REPLAY_CHUNK_SIZE]
+        )
+
+
+async def write_investments(investments: List[dict], session: AsyncSession):
+    await session.execute(delete(Investment))
+    for start in range(0, len(investments), REPLAY_CHUNK_SIZE):
+        await session.execute(
+            insert(Investment.__table__),
+            investments[start:start + REPLAY_CHUNK_SIZE]
+        )
+
+
+async def replay_investments(
+    session: AsyncSession,
+    dry_run: bool = False
+) -> dict:
+    """Rebuild the investment state of every donation and project.
+        Returns the number of changed rows by table.
+    """
+    await data_version_crud.lock(session)
+    donations = await load_stream(Donation, session)
+    projects = await load_stream(CharityProject, session)
+    donation_changes = get_changes(donations, projects)
+    project_changes = get_changes(projects, donations)
+    investments = get_investments(donations, projects)
+    if not dry_run:
+        await write_changes(Donation, donation_changes, session)
+        await write_changes(CharityProject, project_changes, session)
+        await write_investments(investments, session)
+        await session.commit()
+    return {
+        'donations': len(donation_changes),
+        'projects': len(project_changes),
+        'investments': len(investments),
+    }
+
+
+async def main(dry_run: bool) -> None:
+    async with AsyncSessionLocal() as session:
+        report = await replay_investments(session, dry_run)
+    print(REPLAY_REPORT.format(**report))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='only count the rows to be fixed'
+    )
+    asyncio.run(main(parser.parse_args().dry_run))
@@ -0,0 +1,8 @@
+"""Allocation and CRUD benchmarks.
+
+Usage:
+    python -m benchmarks run [--sizes 1000 10000] [--output results.json]
+    python -m benchmarks compare results.json baseline.json
+    python -m benchmarks concurrency [--readers 8] [--duration 5]
+    python -m benchmarks statements [--iterations 2000]
+"""
@@ -0,0 +1,166 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from app.core.config import settings
+from app.services.investment import INVESTMENT_ENGINES
+from benchmarks import __doc__ as usage
+from benchmarks.compare import compare_results
+from benchmarks.concurrency import run_concurrency
+from benchmarks.runner import run_benchmarks
+from benchmarks.statements import run_statements
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+RESULT_LINE = (
+    '{operation} [{size}]: p50 {p50_ms} ms, p95 {p95_ms} ms, '
+    'p99 {p99_ms} ms, запросов к БД {queries_per_request}, '
+    'RSS {peak_rss_kb} KB'
+)
+STATEMENTS_LINE = (
+    '{operation}: подготовка {inline_prepare_us} -> {prebuilt_prepare_us} мкс, '
+    'выполнение {inline_execute_us} -> {prebuilt_execute_us} мкс'
+)
+CONCURRENCY_LINE = (
+    '{profile} [{size}]: чтений {reads_per_second}/с '
+    '({readers} потоков, p95 {read_p95_ms} ms), '
+    'записей {writes_per_second}/с'
+)
+
+
+def run(args: argparse.Namespace) -> int:
+    if args.engine:
+        settings.investment_engine = args.engine
+    report = asyncio.run(run_benchmarks(
+        args.sizes, args.requests, args.list_requests, args.list_max_size
+    ))
+    for result in report['results']:
+        print(RESULT_LINE.format(**result))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+    return 0
+
+
+def concurrency(args: argparse.Namespace) -> int:
+    if args.engine:
+        settings.investment_engine = args.engine
+    report = asyncio.run(run_concurrency(
+        args.sizes, args.readers, args.duration
+    ))
+    for result in report['results']:
+        print(CONCURRENCY_LINE.format(**result))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+    return 0
+
+
+def statements(args: argparse.Namespace) -> int:
+    report = asyncio.run(run_statements(args.iterations))
+    for result in report['results']:
+        print(STATEMENTS_LINE.format(**result))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+    return 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    reports = []
+    for path in (args.current, args.baseline):
+        with open(path, encoding='utf-8') as report:
+            reports.append(json.load(report))
+    lines, regressions = compare_results(*reports, args.threshold)
+    print('\n'.join(lines))
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description=usage.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=usage
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='time the hot paths')
+    run_parser.add_argument(
+        '--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+        help='numbers of the open objects to seed'
+    )
+    run_parser.add_argument(
+        '--requests', type=int, default=50,
+        help='requests per allocating operation'
+    )
+    run_parser.add_argument(
+        '--list-requests', type=int, default=5,
+        help='requests per list endpoint'
+    )
+    run_parser.add_argument(
+        '--list-max-size', type=int, default=100000,
+        help='largest size to time the list endpoints at'
+    )
+    run_parser.add_argument(
+        '--engine', choices=INVESTMENT_ENGINES,
+        help='investment engine, the configured one by default'
+    )
+    run_parser.add_argument('--output', help='JSON file for the results')
+    run_parser.set_defaults(handler=run)
+
+    concurrency_parser = commands.add_parser(
+        'concurrency',
+        help='time the reads under a write load with both engine profiles'
+    )
+    concurrency_parser.add_argument(
+        '--sizes', type=int, nargs='+', default=(10000,),
+        help='numbers of the open projects to seed'
+    )
+    concurrency_parser.add_argument(
+        '--readers', type=int, default=8,
+        help='concurrent readers of the project list'
+    )
+    concurrency_parser.add_argument(
+        '--duration', type=float, default=5.0,
+        help='seconds to run each profile'
+    )
+    concurrency_parser.add_argument(
+        '--engine', choices=INVESTMENT_ENGINES,
+        help='investment engine, the configured one by default'
+    )
+    concurrency_parser.add_argument(
+        '--output', help='JSON file for the results'
+    )
+    concurrency_parser.set_defaults(handler=concurrency)
+
+    statements_parser = commands.add_parser(
+        'statements',
+        help='time the hot statements built per call and prebuilt'
+    )
+    statements_parser.add_argument(
+        '--iterations', type=int, default=2000,
+        help='calls per statement and variant'
+    )
+    statements_parser.add_argument(
+        '--output', help='JSON file for the results'
+    )
+    statements_parser.set_defaults(handler=statements)
+
+    compare_parser = commands.add_parser(
+        'compare', help='compare the results with a baseline'
+    )
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument(
+        '--threshold', type=float, default=0.1,
+        help='allowed relative growth of the latencies'
+    )
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import json
+from typing import Any, Optional, Tuple
+
+
+class ASGIClient:
+    """Minimal HTTP client calling the ASGI application in process.
+        Requests run on the caller's event loop,
+        so the database engine is shared with the rest of the benchmark.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[Any] = None
+    ) -> Tuple[int, bytes]:
+        path, _, query_string = url.partition('?')
+        content = b'' if body is None else json.dumps(body).encode()
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query_string.encode(),
+            'root_path': '',
+            'headers': [
+                (b'host', b'benchmark'),
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(content)).encode()),
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': ('benchmark', 80),
+        }
+        messages = [{'type': 'http.request', 'body': content}]
+        response = {'status': None, 'body': []}
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            elif message['type'] == 'http.response.body':
+                response['body'].append(message.get('body', b''))
+
+        await self.app(scope, receive, send)
+        return response['status'], b''.join(response['body'])
@@ -0,0 +1,47 @@
+from typing import List, Tuple
+
+COMPARED_METRICS = ('p50_ms', 'p95_ms', 'queries_per_request')
+COMPARISON_LINE = '{operation} [{size}] {metric}: {old} -> {new} ({change:+.1f}%){mark}'
+REGRESSION_MARK = ' РЕГРЕССИЯ'
+MISSING_BASELINE = '{operation} [{size}]: нет в базовом замере'
+
+
+def compare_results(
+    current: dict,
+    baseline: dict,
+    threshold: float
+) -> Tuple[List[str], int]:
+    """Compare the run with the baseline run.
+        A metric regresses if it grows by more than threshold,
+        any growth of queries per request is a regression.
+        Returns the report lines and the number of regressions.
+    """
+    baseline_results = {
+        (result['size'], result['operation']): result
+        for result in baseline['results']
+    }
+    lines = []
+    regressions = 0
+    for result in current['results']:
+        old_result = baseline_results.get(
+            (result['size'], result['operation'])
+        )
+        if old_result is None:
+            lines.append(MISSING_BASELINE.format(**result))
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = old_result[metric], result[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            allowed = 0 if metric == 'queries_per_request' else threshold
+            is_regression = new > old * (1 + allowed)
+            regressions += is_regression
+            lines.append(COMPARISON_LINE.format(
+                operation=result['operation'],
+                size=result['size'],
+                metric=metric,
+                old=old,
+                new=new,
+                change=change,
+                mark=REGRESSION_MARK if is_regression else ''
+            ))
+    return lines, regressions
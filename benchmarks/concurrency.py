@@ -0,0 +1,109 @@
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.db import create_database_engine
+from app.main import app
+from app.services.open_pool import open_pool
+from benchmarks.client import ASGIClient
+from benchmarks.runner import (BENCHMARK_AMOUNT, BENCHMARK_ERROR,
+                               get_percentile, override_dependencies)
+from benchmarks.seed import seed_database
+
+READ_URL = '/charity_project/?limit=100'
+WRITE_URL = '/donation/'
+PROFILES = {'default': False, 'tuned': True}
+
+
+async def request_until(
+    client: ASGIClient,
+    method: str,
+    url: str,
+    deadline: float,
+    timings: List[float]
+) -> None:
+    body = {'full_amount': BENCHMARK_AMOUNT} if method == 'POST' else None
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        status, content = await client.request(method, url, body)
+        timings.append(time.perf_counter() - start)
+        if status >= 400:
+            raise RuntimeError(
+                BENCHMARK_ERROR.format(method, url, status, content.decode())
+            )
+
+
+async def run_profile(
+    directory: Path,
+    size: int,
+    readers: int,
+    duration: float,
+    profile: str
+) -> Dict:
+    """Read the project list from readers tasks
+        while a writer keeps creating donations.
+        The tuned profile reads through its own read-only engine.
+    """
+    path = directory / f'{profile}_{size}.db'
+    seed_database(path, size, 'charity_project')
+    url = f'sqlite+aiosqlite:///{path}'
+    tuned = PROFILES[profile]
+    engine = create_database_engine(url, tuned)
+    read_engine = create_database_engine(url, read_only=True) if tuned else engine
+    override_dependencies(
+        sessionmaker(engine, class_=AsyncSession),
+        sessionmaker(read_engine, class_=AsyncSession)
+    )
+    open_pool.version = None
+    client = ASGIClient(app)
+    reads, writes = [], []
+    deadline = time.perf_counter() + duration
+    try:
+        await asyncio.gather(
+            request_until(client, 'POST', WRITE_URL, deadline, writes),
+            *(
+                request_until(client, 'GET', READ_URL, deadline, reads)
+                for _ in range(readers)
+            )
+        )
+    finally:
+        app.dependency_overrides = {}
+        await read_engine.dispose()
+        await engine.dispose()
+    reads.sort()
+    return {
+        'profile': profile,
+        'size': size,
+        'readers': readers,
+        'reads_per_second': round(len(reads) / duration, 1),
+        'writes_per_second': round(len(writes) / duration, 1),
+        'read_p95_ms': round(get_percentile(reads, 95) * 1000, 3),
+    }
+
+
+async def run_concurrency(
+    sizes: List[int],
+    readers: int,
+    duration: float
+) -> dict:
+    """Compare the read throughput of the driver defaults
+        and of the tuned engine profile under a steady write load.
+    """
+    settings.allocation_mode = 'inline'
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            for profile in PROFILES:
+                results.append(await run_profile(
+                    Path(directory), size, readers, duration, profile
+                ))
+    return {
+        'engine': settings.investment_engine,
+        'results': results,
+    }
@@ -0,0 +1,271 @@
+import math
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.db import get_async_session, get_read_session
+from app.core.user import current_superuser, current_user
+from app.crud.charity_project import charityproject_crud
+from app.crud.donation import donation_crud
+from app.main import app
+from app.models import User
+from app.schemas.charity_project import CharityProjectCreate
+from app.schemas.donation import DonationCreate
+from app.services.investment import execute_investment_process
+from app.services.open_pool import open_pool
+from benchmarks.client import ASGIClient
+from benchmarks.seed import SEED_USER_ID, seed_database
+
+PERCENTILES = (50, 95, 99)
+BENCHMARK_AMOUNT = 100
+BENCHMARK_ERROR = '{} {} вернул статус {}: {}'
+
+benchmark_user = User(
+    id=SEED_USER_ID,
+    is_active=True,
+    is_verified=True,
+    is_superuser=True,
+)
+
+
+class QueryCounter:
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, 'before_cursor_execute', self)
+
+    def __call__(self, *args) -> None:
+        self.count += 1
+
+
+def override_dependencies(
+    session_factory: sessionmaker,
+    read_session_factory: Optional[sessionmaker] = None
+) -> None:
+    """Serve the requests from the benchmark database as a superuser.
+        The reads go through read_session_factory if it is given.
+    """
+    def get_session_dependency(factory: sessionmaker):
+        async def get_benchmark_session():
+            async with factory() as session:
+                yield session
+        return get_benchmark_session
+
+    app.dependency_overrides = {
+        get_async_session: get_session_dependency(session_factory),
+        get_read_session: get_session_dependency(
+            read_session_factory or session_factory
+        ),
+        current_user: lambda: benchmark_user,
+        current_superuser: lambda: benchmark_user,
+    }
+
+
+def get_peak_rss_kb() -> int:
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss // 1024 if sys.platform == 'darwin' else peak_rss
+
+
+def get_percentile(timings: List[float], percent: int) -> float:
+    """Nearest-rank percentile of the sorted timings."""
+    rank = max(math.ceil(percent / 100 * len(timings)), 1)
+    return timings[rank - 1]
+
+
+async def measure(
+    operation: Callable[[int], Awaitable[float]],
+    requests: int,
+    counter: QueryCounter
+) -> Dict[str, float]:
+    """Run the operation requests times.
+        The operation returns its own duration,
+        so the preparation steps are not timed.
+    """
+    queries = counter.count
+    timings = sorted([await operation(number) for number in range(requests)])
+    report = {
+        f'p{percent}_ms': round(get_percentile(timings, percent) * 1000, 3)
+        for percent in PERCENTILES
+    }
+    report['mean_ms'] = round(sum(timings) / requests * 1000, 3)
+    report['queries_per_request'] = round(
+        (counter.count - queries) / requests, 2
+    )
+    report['requests'] = requests
+    return report
+
+
+def timed_request(
+    client: ASGIClient,
+    method: str,
+    url: str,
+    get_body: Callable[[int], dict] = lambda number: None
+) -> Callable[[int], Awaitable[float]]:
+    async def operation(number: int) -> float:
+        start = time.perf_counter()
+        status, content = await client.request(method, url, get_body(number))
+        duration = time.perf_counter() - start
+        if status >= 400:
+            raise RuntimeError(
+                BENCHMARK_ERROR.format(method, url, status, content.decode())
+            )
+        return duration
+    return operation
+
+
+def timed_investment(
+    session_factory: sessionmaker,
+    open_model: str
+) -> Callable[[int], Awaitable[float]]:
+    async def operation(number: int) -> float:
+        async with session_factory() as session:
+            if open_model == 'charity_project':
+                object_in = await donation_crud.create(
+                    DonationCreate(full_amount=BENCHMARK_AMOUNT),
+                    session,
+                    benchmark_user
+                )
+            else:
+                object_in = await charityproject_crud.create(
+                    CharityProjectCreate(
+                        name=f'Замер {number}',
+                        description='Проект для замеров',
+                        full_amount=BENCHMARK_AMOUNT
+                    ),
+                    session
+                )
+            start = time.perf_counter()
+            await execute_investment_process(object_in, session)
+            return time.perf_counter() - start
+    return operation
+
+
+def get_operations(
+    client: ASGIClient,
+    session_factory: sessionmaker,
+    open_model: str
+) -> Dict[str, Callable[[int], Awaitable[float]]]:
+    """Timed operations of the scenario with the open_model objects open.
+        The new objects are invested into the open ones.
+    """
+    if open_model == 'charity_project':
+        return {
+            'execute_investment_process[donation]': timed_investment(
+                session_factory, open_model
+            ),
+            'POST /donation/': timed_request(
+                client,
+                'POST',
+                '/donation/',
+                lambda number: {'full_amount': BENCHMARK_AMOUNT}
+            ),
+        }
+    return {
+        'execute_investment_process[charity_project]': timed_investment(
+            session_factory, open_model
+        ),
+        'POST /charity_project/': timed_request(
+            client,
+            'POST',
+            '/charity_project/',
+            lambda number: {
+                'name': f'Новый проект {number}',
+                'description': 'Проект для замеров',
+                'full_amount': BENCHMARK_AMOUNT,
+            }
+        ),
+    }
+
+
+def get_list_operations(
+    client: ASGIClient,
+    open_model: str
+) -> Dict[str, Callable[[int], Awaitable[float]]]:
+    if open_model == 'charity_project':
+        return {
+            'GET /charity_project/': timed_request(
+                client, 'GET', '/charity_project/'
+            ),
+        }
+    return {
+        'GET /donation/': timed_request(client, 'GET', '/donation/'),
+        'GET /donation/my': timed_request(client, 'GET', '/donation/my'),
+    }
+
+
+async def run_scenario(
+    directory: Path,
+    size: int,
+    open_model: str,
+    requests: int,
+    list_requests: int
+) -> List[dict]:
+    path = directory / f'{open_model}_{size}.db'
+    seed_database(path, size, open_model)
+    engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+    session_factory = sessionmaker(engine, class_=AsyncSession)
+    counter = QueryCounter(engine)
+
+    override_dependencies(session_factory)
+    open_pool.version = None
+    client = ASGIClient(app)
+    operations = [
+        (operation, requests) for operation in get_operations(
+            client, session_factory, open_model
+        ).items()
+    ]
+    if list_requests:
+        operations += [
+            (operation, list_requests) for operation in get_list_operations(
+                client, open_model
+            ).items()
+        ]
+    results = []
+    try:
+        for (name, operation), count in operations:
+            result = dict(size=size, operation=name)
+            result.update(await measure(operation, count, counter))
+            result['peak_rss_kb'] = get_peak_rss_kb()
+            results.append(result)
+    finally:
+        app.dependency_overrides = {}
+        await engine.dispose()
+        path.unlink()
+    return results
+
+
+async def run_benchmarks(
+    sizes: List[int],
+    requests: int,
+    list_requests: int,
+    list_max_size: int
+) -> dict:
+    """Seed a database per size and scenario and time the hot paths.
+        The list endpoints return every row,
+        so they are skipped above list_max_size.
+    """
+    settings.allocation_mode = 'inline'
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            for open_model in ('charity_project', 'donation'):
+                results += await run_scenario(
+                    Path(directory),
+                    size,
+                    open_model,
+                    requests,
+                    list_requests if size <= list_max_size else 0
+                )
+    return {
+        'engine': settings.investment_engine,
+        'python': sys.version.split()[0],
+        'results': results,
+    }
@@ -0,0 +1,75 @@
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from app.core.db import Base
+
+SEED_START = datetime(2020, 1, 1)
+SEED_CHUNK_SIZE = 10000
+SEED_FULL_AMOUNT = 1000
+SEED_INVESTED_AMOUNT = 500
+SEED_USER_ID = 1
+
+
+def create_schema(path: Path) -> None:
+    engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+
+def get_create_dates(size: int):
+    return (SEED_START + timedelta(seconds=second) for second in range(size))
+
+
+def insert_donations(connection, size: int, is_open: bool) -> None:
+    rows = (
+        (
+            SEED_FULL_AMOUNT if is_open else SEED_INVESTED_AMOUNT,
+            SEED_INVESTED_AMOUNT,
+            not is_open,
+            create_date,
+            None if is_open else create_date,
+            SEED_USER_ID,
+        ) for create_date in get_create_dates(size)
+    )
+    connection.executemany(
+        'INSERT INTO donation (full_amount, invested_amount, fully_invested, '
+        'create_date, close_date, user_id, version) '
+        'VALUES (?, ?, ?, ?, ?, ?, 1)',
+        rows
+    )
+
+
+def insert_projects(connection, size: int, is_open: bool) -> None:
+    rows = (
+        (
+            f'Проект {number}',
+            'Проект для замеров',
+            SEED_FULL_AMOUNT if is_open else SEED_INVESTED_AMOUNT,
+            SEED_INVESTED_AMOUNT,
+            not is_open,
+            create_date,
+            None if is_open else create_date,
+        ) for number, create_date in enumerate(get_create_dates(size))
+    )
+    connection.executemany(
+        'INSERT INTO charityproject (name, description, full_amount, '
+        'invested_amount, fully_invested, create_date, close_date, version) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, 1)',
+        rows
+    )
+
+
+def seed_database(path: Path, size: int, open_model: str) -> None:
+    """Create a database with size open objects of open_model.
+        Each open object is half invested by a closed object
+        of the other model, as the allocator would have left them.
+    """
+    create_schema(path)
+    connection = sqlite3.connect(path)
+    with connection:
+        insert_projects(connection, size, open_model == 'charity_project')
+        insert_donations(connection, size, open_model == 'donation')
+    connection.close()
@@ -0,0 +1,138 @@
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import undefer
+from sqlalchemy.sql import Executable
+from sqlalchemy.sql.expression import false
+
+from app.crud.charity_project import SELECT_PROJECT
+from app.crud.data_version import SELECT_VERSION
+from app.crud.donation import SELECT_DONATION
+from app.crud.fund_stats import SELECT_OPEN_AMOUNTS
+from app.models import CharityProject, DataVersion, Donation, FundStats
+from app.models.data_version import DATA_VERSION_ID
+from app.models.fund_stats import FUND_STATS_ID
+from app.services.constants import INVESTMENT_CHUNK_SIZE
+from app.services.investment import SELECT_NOT_INVESTED
+from benchmarks.seed import seed_database
+
+STATEMENTS_SEED_SIZE = 1000
+
+
+def get_statements() -> Dict[str, tuple]:
+    """The hot statements as they were built on every call
+        and as the prebuilt ones with their parameters.
+    """
+    return {
+        'get_charity_project': (
+            lambda: select(CharityProject).where(
+                CharityProject.id == 1
+            ).options(
+                undefer(CharityProject.description)
+            ),
+            SELECT_PROJECT,
+            {'project_id': 1},
+        ),
+        'get_donation': (
+            lambda: select(Donation).where(Donation.id == 1),
+            SELECT_DONATION,
+            {'donation_id': 1},
+        ),
+        'get_version': (
+            lambda: select(DataVersion.version).where(
+                DataVersion.id == DATA_VERSION_ID
+            ),
+            SELECT_VERSION,
+            {},
+        ),
+        'get_open_amounts': (
+            lambda: select(
+                FundStats.open_projects_amount,
+                (
+                    FundStats.donated_amount - FundStats.invested_amount
+                ).label('open_donations_amount')
+            ).where(
+                FundStats.id == FUND_STATS_ID
+            ),
+            SELECT_OPEN_AMOUNTS,
+            {},
+        ),
+        'get_not_invested_objects': (
+            lambda: select(CharityProject).where(
+                CharityProject.fully_invested == false()
+            ).order_by(
+                CharityProject.create_date, CharityProject.id
+            ).limit(INVESTMENT_CHUNK_SIZE),
+            SELECT_NOT_INVESTED[CharityProject, False],
+            {'chunk_size': INVESTMENT_CHUNK_SIZE},
+        ),
+    }
+
+
+async def time_executions(
+    session: AsyncSession,
+    get_statement: Callable[[], Executable],
+    parameters: dict,
+    iterations: int
+) -> float:
+    """Mean seconds per execution, the statement is got on every call."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = await session.execute(get_statement(), parameters)
+        result.all()
+    return (time.perf_counter() - start) / iterations
+
+
+def time_preparation(
+    get_statement: Callable[[], Executable],
+    iterations: int
+) -> float:
+    """Mean seconds to get the statement and its compiled cache key."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        get_statement()._generate_cache_key()
+    return (time.perf_counter() - start) / iterations
+
+
+async def run_statements(iterations: int) -> dict:
+    """Time the hot statements built per call against the prebuilt ones.
+        The preparation is the Python overhead alone,
+        the execution adds a round trip to a small database.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'statements.db'
+        seed_database(path, STATEMENTS_SEED_SIZE, 'charity_project')
+        engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+        try:
+            async with AsyncSession(engine) as session:
+                for name, (build, statement, parameters) in (
+                    get_statements().items()
+                ):
+                    def prebuilt():
+                        return statement
+                    result = dict(operation=name)
+                    for variant, get_statement in (
+                        ('inline', build), ('prebuilt', prebuilt)
+                    ):
+                        await time_executions(
+                            session, get_statement, parameters, 10
+                        )
+                        result[f'{variant}_prepare_us'] = round(
+                            time_preparation(get_statement, iterations) * 1e6,
+                            2
+                        )
+                        result[f'{variant}_execute_us'] = round(
+                            await time_executions(
+                                session, get_statement, parameters, iterations
+                            ) * 1e6,
+                            2
+                        )
+                    results.append(result)
+        finally:
+            await engine.dispose()
+    return {'iterations': iterations, 'results': results}
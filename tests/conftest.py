@@ -56,6 +56,7 @@ engine = create_async_engine(
 TestingSessionLocal = sessionmaker(
     class_=AsyncSession, autocommit=False, autoflush=False, bind=engine,
 )
+read_engine = create_async_engine(SQLALCHEMY_DATABASE_URL)
 
 
 async def override_db():
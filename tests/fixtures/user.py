@@ -1,11 +1,25 @@
 import pytest
 from conftest import (
-    app, current_superuser, current_user, get_async_session, override_db
+    app, current_superuser, current_user, get_async_session, override_db,
+    read_engine
 )
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 
+from app.core.db import get_read_session
 from app.models.user import User
 
+TestingReadSessionLocal = sessionmaker(
+    class_=AsyncSession, expire_on_commit=False, bind=read_engine,
+)
+
+
+async def override_read_db():
+    async with TestingReadSessionLocal() as session:
+        yield session
+
+
 superuser = User(
     id=1,
     is_active=True,
@@ -32,6 +46,7 @@ not_auth_user = User(
 def user_client():
     app.dependency_overrides = {}
     app.dependency_overrides[get_async_session] = override_db
+    app.dependency_overrides[get_read_session] = override_read_db
     app.dependency_overrides[current_user] = lambda: user
     with TestClient(app) as client:
         yield client
@@ -41,6 +56,7 @@ def user_client():
 def test_client():
     app.dependency_overrides = {}
     app.dependency_overrides[get_async_session] = override_db
+    app.dependency_overrides[get_read_session] = override_read_db
     app.dependency_overrides[current_user] = lambda: not_auth_user
     with TestClient(app) as client:
         yield client
@@ -50,6 +66,24 @@ def test_client():
 def superuser_client():
     app.dependency_overrides = {}
     app.dependency_overrides[get_async_session] = override_db
+    app.dependency_overrides[get_read_session] = override_read_db
     app.dependency_overrides[current_superuser] = lambda: superuser
     with TestClient(app) as client:
         yield client
+
+
+@pytest.fixture
+def auth_client():
+    """Client authenticated by a token of a registered user."""
+    app.dependency_overrides = {}
+    app.dependency_overrides[get_async_session] = override_db
+    app.dependency_overrides[get_read_session] = override_read_db
+    credentials = {'username': 'dead@pool.com', 'password': 'chimichangas4life'}
+    with TestClient(app) as client:
+        client.post('/auth/register', json={
+            'email': credentials['username'],
+            'password': credentials['password'],
+        })
+        response = client.post('/auth/jwt/login', data=credentials)
+        client.headers['Authorization'] = f'Bearer {response.json()["access_token"]}'
+        yield client
@@ -1,3 +1,8 @@
+from conftest import engine
+from fastapi_users.password import PasswordHelper
+from sqlalchemy import event
+
+
 
 
 def test_register(test_client):
@@ -40,3 +45,51 @@ def test_register_invalid_pass(user_client):
             'reason': 'Password should be at least 3 characters',
         },
     }, 'При некорректной регистрации пользователя тело ответа API отличается от ожидаемого.'
+
+
+def test_password_check_releases_writer(monkeypatch, auth_client):
+    connections = []
+    open_connections = []
+    verify_and_update = PasswordHelper.verify_and_update
+    hash_password = PasswordHelper.hash
+
+    def count_checkout(*args):
+        connections.append(1)
+
+    def count_checkin(*args):
+        connections.append(-1)
+
+    def verify_and_count(self, *args):
+        open_connections.append(sum(connections))
+        return verify_and_update(self, *args)
+
+    def hash_and_count(self, *args):
+        open_connections.append(sum(connections))
+        return hash_password(self, *args)
+
+    monkeypatch.setattr(PasswordHelper, 'verify_and_update', verify_and_count)
+    monkeypatch.setattr(PasswordHelper, 'hash', hash_and_count)
+    event.listen(engine.sync_engine, 'checkout', count_checkout)
+    event.listen(engine.sync_engine, 'checkin', count_checkin)
+    try:
+        register = auth_client.post('/auth/register', json={
+            'email': 'wade@pool.com',
+            'password': 'chimichangas4life',
+        })
+        login = auth_client.post('/auth/jwt/login', data={
+            'username': 'wade@pool.com',
+            'password': 'chimichangas4life',
+        })
+    finally:
+        event.remove(engine.sync_engine, 'checkout', count_checkout)
+        event.remove(engine.sync_engine, 'checkin', count_checkin)
+    assert register.status_code == 201, (
+        'При регистрации пользователя должен возвращаться статус-код 201.'
+    )
+    assert login.status_code == 200, (
+        'При входе пользователя должен возвращаться статус-код 200.'
+    )
+    assert connections and open_connections == [0, 0], (
+        'Подключение к основной базе должно возвращаться '
+        'до проверки и хеширования пароля.'
+    )
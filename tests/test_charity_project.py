@@ -1,6 +1,14 @@
 from datetime import datetime
 
 import pytest
+from conftest import read_engine
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+
+from app.api.conditional import is_not_modified
+from app.schemas.charity_project import CharityProjectDB
 
 
 @pytest.mark.parametrize(
@@ -621,3 +629,190 @@ def test_get_all_charity_project_not_auth_user(test_client, charity_project, cha
             'name': 'nunchaku'
         }
     ]
+
+
+def test_get_charity_projects_keyset_pages(test_client, charity_project, charity_project_nunchaku, small_fully_charity_project):
+    response = test_client.get('/charity_project/', params={'limit': 2})
+    assert [project['id'] for project in response.json()] == [1, 2], (
+        'Страница должна содержать не больше `limit` проектов в порядке создания.'
+    )
+    cursor = response.headers.get('X-Next-Cursor')
+    assert cursor, (
+        'Курсор следующей страницы должен передаваться в заголовке `X-Next-Cursor`.'
+    )
+    response = test_client.get('/charity_project/', params={'limit': 2, 'cursor': cursor})
+    assert [project['id'] for project in response.json()] == [3], (
+        'Следующая страница должна начинаться после последнего проекта предыдущей.'
+    )
+    assert 'X-Next-Cursor' not in response.headers, (
+        'У последней страницы не должно быть курсора следующей страницы.'
+    )
+    response = test_client.get('/charity_project/', params={'fully_invested': False})
+    assert [project['id'] for project in response.json()] == [1, 2], (
+        'Фильтр `fully_invested` должен отбирать только открытые проекты.'
+    )
+
+
+def test_get_charity_projects_invalid_cursor(test_client, charity_project):
+    response = test_client.get('/charity_project/', params={'limit': 2, 'cursor': 'not-a-cursor'})
+    assert response.status_code == 422, (
+        'При некорректном курсоре должна возвращаться ошибка 422.'
+    )
+
+
+def test_get_charity_projects_not_modified(test_client, charity_project, mixer):
+    response = test_client.get('/charity_project/')
+    etag = response.headers.get('ETag')
+    assert etag and response.headers.get('Last-Modified'), (
+        'Список проектов должен отдаваться с заголовками `ETag` и `Last-Modified`.'
+    )
+    response = test_client.get('/charity_project/', headers={'If-None-Match': etag})
+    assert response.status_code == 304, (
+        'Если данные не менялись, на запрос с `If-None-Match` должен возвращаться статус-код 304.'
+    )
+    response = test_client.get(
+        '/charity_project/', headers={'If-Modified-Since': response.headers['Last-Modified']}
+    )
+    assert response.status_code == 200, (
+        'Если у ответа есть `ETag`, заголовок `If-Modified-Since` должен игнорироваться.'
+    )
+    mixer.blend('app.models.donation.Donation', full_amount=100)
+    response = test_client.get('/charity_project/', headers={'If-None-Match': etag})
+    assert response.status_code == 200, (
+        'После изменения данных список проектов должен отдаваться заново.'
+    )
+    assert response.headers['ETag'] != etag, (
+        'После изменения данных `ETag` списка проектов должен меняться.'
+    )
+
+
+@pytest.mark.parametrize('if_modified_since, expected', [
+    ('Sun, 10 Oct 2010 00:00:00 GMT', False),
+    ('Sun, 10 Oct 2010 00:00:01 GMT', True),
+])
+def test_not_modified_since_same_second(if_modified_since, expected):
+    request = Request({
+        'type': 'http',
+        'headers': [(b'if-modified-since', if_modified_since.encode())],
+    })
+    assert is_not_modified(request, last_modified='Sun, 10 Oct 2010 00:00:00 GMT') is expected, (
+        'Изменение в ту же секунду, что и дата `If-Modified-Since`, должно считаться изменением.'
+    )
+
+
+def test_get_charity_projects_single_read_transaction(test_client, charity_project):
+    transactions = []
+
+    def count_transaction(connection):
+        transactions.append(connection)
+
+    event.listen(read_engine.sync_engine, 'begin', count_transaction)
+    try:
+        response = test_client.get('/charity_project/')
+    finally:
+        event.remove(read_engine.sync_engine, 'begin', count_transaction)
+    assert response.status_code == 200, (
+        'При GET-запросе к эндпоинту `/charity_project/` должен возвращаться статус-код 200.'
+    )
+    assert len(transactions) == 1, (
+        '`ETag` и список проектов должны читаться в одной транзакции.'
+    )
+
+
+def test_get_charity_project_by_id(test_client, charity_project, charity_project_nunchaku):
+    response = test_client.get('/charity_project/2')
+    assert response.status_code == 200, (
+        'При GET-запросе к эндпоинту `/charity_project/{project_id}` должен возвращаться статус-код 200.'
+    )
+    assert response.json()['name'] == 'nunchaku', (
+        'При GET-запросе к эндпоинту `/charity_project/{project_id}` должен возвращаться запрошенный проект.'
+    )
+    response = test_client.get('/charity_project/2', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304, (
+        'Если проект не менялся, на запрос с `If-None-Match` должен возвращаться статус-код 304.'
+    )
+    response = test_client.get('/charity_project/3')
+    assert response.status_code == 422, (
+        'При запросе несуществующего проекта должна возвращаться ошибка 422.'
+    )
+
+
+def test_get_charity_projects_sparse_fields(test_client, charity_project):
+    statements = []
+
+    def collect_statement(connection, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(read_engine.sync_engine, 'before_cursor_execute', collect_statement)
+    try:
+        response = test_client.get('/charity_project/', params={'fields': 'name,invested_amount'})
+    finally:
+        event.remove(read_engine.sync_engine, 'before_cursor_execute', collect_statement)
+    assert response.json() == [{'name': 'chimichangas4life', 'invested_amount': 0}], (
+        'Параметр `fields` должен ограничивать поля проектов в ответе.'
+    )
+    assert not any('description' in statement for statement in statements), (
+        'Поля, которые не запрошены, не должны читаться из базы данных.'
+    )
+    response = test_client.get('/charity_project/', params={'fields': 'name,secret'})
+    assert response.status_code == 422, (
+        'При запросе неизвестного поля должна возвращаться ошибка 422.'
+    )
+
+
+def test_get_charity_projects_matches_response_model(test_client, mixer):
+    project = mixer.blend(
+        'app.models.charity_project.CharityProject',
+        name='Проект "кавычки" \\ и \u2028',
+        description='Строка\nс\tуправляющими\x01символами — ✓',
+        full_amount=1000,
+        create_date=datetime(2010, 10, 10, 10, 10, 10, 123456),
+    )
+    response = test_client.get('/charity_project/')
+    expected = JSONResponse(jsonable_encoder(
+        [CharityProjectDB.from_orm(project)], exclude_none=True
+    ))
+    assert response.content == expected.body, (
+        'Список проектов должен сериализоваться побайтно так же, '
+        'как и через схему ответа.'
+    )
+
+
+def test_search_charity_projects(superuser_client, mixer):
+    for name, description in (
+        ('Шоколад детям', 'Шоколад и шоколадные конфеты для детских домов'),
+        ('Книги', 'Книги для сельских библиотек'),
+        ('Сладости', 'Конфеты и немного шоколада'),
+    ):
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            name=name,
+            description=description,
+            full_amount=1000,
+        )
+    response = superuser_client.get('/charity_project/search', params={'q': 'шоколад'})
+    assert response.status_code == 200, (
+        'При поиске проектов должен возвращаться статус 200.'
+    )
+    assert [project['name'] for project in response.json()] == ['Шоколад детям', 'Сладости'], (
+        'Поиск должен находить проекты по словам названия и описания, '
+        'самые подходящие проекты должны идти первыми.'
+    )
+    first_page = superuser_client.get('/charity_project/search', params={'q': 'шоколад', 'limit': 1})
+    second_page = superuser_client.get(
+        '/charity_project/search',
+        params={'q': 'шоколад', 'limit': 1, 'cursor': first_page.headers['X-Next-Cursor']}
+    )
+    assert [project['name'] for project in first_page.json() + second_page.json()] == [
+        'Шоколад детям', 'Сладости'
+    ], 'Результаты поиска должны разбиваться на страницы курсором.'
+    project_id = response.json()[1]['id']
+    superuser_client.patch(f'/charity_project/{project_id}', json={'description': 'Фрукты'})
+    response = superuser_client.get('/charity_project/search', params={'q': 'шоколад'})
+    assert [project['name'] for project in response.json()] == ['Шоколад детям'], (
+        'Поиск должен учитывать изменения описания проекта.'
+    )
+    response = superuser_client.get('/charity_project/search', params={'q': 'фрукты "NEAR('})
+    assert response.status_code == 200, (
+        'Спецсимволы в строке поиска не должны приводить к ошибке.'
+    )
@@ -1,4 +1,15 @@
+import asyncio
+import sqlite3
+
+import pytest
 from conftest import BASE_DIR
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db import begin_write, create_database_engine, create_read_engine
 
 
 try:
@@ -50,3 +61,142 @@ def test_check_db_url():
             assert 'sqlite+aiosqlite' in attr_value['default'], (
                 'Укажите значение по умолчанию для подключения базы данных sqlite '
             )
+
+
+@pytest.mark.parametrize('setting', ['investment_engine', 'allocation_mode'])
+def test_settings_reject_unknown_modes(setting):
+    with pytest.raises(ValidationError):
+        Settings(**{setting: 'unknown'})
+
+
+async def test_engine_profile_pragmas(tmp_path):
+    engine = create_database_engine(f'sqlite+aiosqlite:///{tmp_path / "profile.db"}')
+    try:
+        async with engine.connect() as connection:
+            journal_mode = await connection.execute(text('PRAGMA journal_mode'))
+            busy_timeout = await connection.execute(text('PRAGMA busy_timeout'))
+            assert journal_mode.scalar() == 'wal', (
+                'Новые подключения к SQLite должны работать в режиме WAL.'
+            )
+            assert busy_timeout.scalar() == Settings().sqlite_busy_timeout, (
+                'Новые подключения к SQLite должны получать busy_timeout из настроек.'
+            )
+    finally:
+        await engine.dispose()
+
+
+async def test_writers_do_not_fail_upgrading_reads(tmp_path):
+    engine = create_database_engine(f'sqlite+aiosqlite:///{tmp_path / "write.db"}')
+
+    async def read_and_write(session: AsyncSession):
+        await begin_write(session)
+        items = await session.execute(text('SELECT count(*) FROM item'))
+        await asyncio.sleep(0.05)
+        await session.execute(
+            text('INSERT INTO item VALUES (:id)'), {'id': items.scalar()}
+        )
+        await session.commit()
+
+    try:
+        async with engine.begin() as connection:
+            await connection.execute(text('CREATE TABLE item (id INTEGER)'))
+        async with AsyncSession(engine) as first, AsyncSession(engine) as second:
+            await asyncio.gather(read_and_write(first), read_and_write(second))
+        async with engine.connect() as connection:
+            items = await connection.execute(text('SELECT id FROM item ORDER BY id'))
+            assert items.scalars().all() == [0, 1], (
+                'Транзакции записи должны начинаться с блокировки базы, '
+                'чтобы параллельные писатели выполнялись по очереди.'
+            )
+    finally:
+        await engine.dispose()
+
+
+async def test_reads_do_not_take_write_lock(tmp_path):
+    database = tmp_path / 'write.db'
+    engine = create_database_engine(f'sqlite+aiosqlite:///{database}')
+    writer = sqlite3.connect(database, isolation_level=None)
+    writer.execute('PRAGMA busy_timeout = 0')
+    try:
+        async with engine.begin() as connection:
+            await connection.execute(text('CREATE TABLE item (id INTEGER)'))
+        async with AsyncSession(engine) as session:
+            await session.execute(text('SELECT count(*) FROM item'))
+            writer.execute('BEGIN IMMEDIATE')
+            writer.execute('ROLLBACK')
+            await session.rollback()
+            await begin_write(session)
+            with pytest.raises(sqlite3.OperationalError):
+                writer.execute('BEGIN IMMEDIATE')
+    finally:
+        writer.close()
+        await engine.dispose()
+
+
+async def test_read_engine_is_read_only(tmp_path):
+    url = f'sqlite+aiosqlite:///{tmp_path / "read.db"}'
+    engine = create_database_engine(url)
+    read_engine = create_database_engine(url, read_only=True)
+    try:
+        async with engine.begin() as connection:
+            await connection.execute(text('CREATE TABLE item (id INTEGER)'))
+        async with read_engine.connect() as connection:
+            items = await connection.execute(text('SELECT count(*) FROM item'))
+            assert items.scalar() == 0, (
+                'Подключения только для чтения должны видеть данные основной базы.'
+            )
+            with pytest.raises(OperationalError):
+                await connection.execute(text('INSERT INTO item VALUES (1)'))
+    finally:
+        await read_engine.dispose()
+        await engine.dispose()
+
+
+async def test_replica_engine_is_read_only(monkeypatch, tmp_path):
+    replica = tmp_path / 'replica.db'
+    writer = sqlite3.connect(replica, isolation_level=None)
+    writer.execute('CREATE TABLE item (id INTEGER)')
+    monkeypatch.setattr(settings, 'replica_url', f'sqlite+aiosqlite:///{replica}')
+    read_engine = create_read_engine()
+    try:
+        async with read_engine.begin() as connection:
+            items = await connection.execute(text('SELECT count(*) FROM item'))
+            assert items.scalar() == 0, (
+                'Движок чтения должен читать данные реплики.'
+            )
+            writer.execute('BEGIN IMMEDIATE')
+            writer.execute('ROLLBACK')
+            journal_mode = await connection.execute(text('PRAGMA journal_mode'))
+            assert journal_mode.scalar() == 'delete', (
+                'Движок чтения не должен менять режим журнала реплики.'
+            )
+            with pytest.raises(OperationalError):
+                await connection.execute(text('INSERT INTO item VALUES (1)'))
+    finally:
+        await read_engine.dispose()
+        writer.close()
+
+
+async def test_read_session_sees_one_snapshot(tmp_path):
+    url = f'sqlite+aiosqlite:///{tmp_path / "read.db"}'
+    engine = create_database_engine(url)
+    read_engine = create_database_engine(url, read_only=True)
+    try:
+        async with engine.begin() as connection:
+            await connection.execute(text('CREATE TABLE item (id INTEGER)'))
+        async with AsyncSession(read_engine) as session:
+            before = await session.execute(text('SELECT count(*) FROM item'))
+            async with engine.begin() as connection:
+                await connection.execute(text('INSERT INTO item VALUES (1)'))
+            after = await session.execute(text('SELECT count(*) FROM item'))
+            assert before.scalar() == after.scalar() == 0, (
+                'Все запросы сессии чтения должны видеть один снимок базы.'
+            )
+            await session.close()
+            items = await session.execute(text('SELECT count(*) FROM item'))
+            assert items.scalar() == 1, (
+                'После закрытия сессия чтения должна видеть новые данные.'
+            )
+    finally:
+        await read_engine.dispose()
+        await engine.dispose()
@@ -1,6 +1,10 @@
 from datetime import datetime
 
 import pytest
+from conftest import engine, read_engine
+from sqlalchemy import event
+
+from app.api.endpoints import donation as donation_endpoints
 
 
 @pytest.mark.parametrize('json, keys, expected_data', [
@@ -178,3 +182,161 @@ def test_create_donation_check_create_date(user_client):
     assert response_1.json()['create_date'] != response_2.json()['create_date'], (
         'При создании двух пожертвований с паузой (в 1 секунду, например) у них должны быть разные `create_date`'
     )
+
+
+def test_create_donations_bulk(superuser_client, mixer):
+    charity_project = mixer.blend(
+        'app.models.charity_project.CharityProject',
+        full_amount=1000,
+        create_date=datetime.now(),
+    )
+    response = superuser_client.post('/donation/bulk', json=[
+        {'full_amount': 400, 'comment': 'first'},
+        {'full_amount': 400},
+        {'full_amount': 400},
+    ])
+    assert response.status_code == 200, (
+        'При пакетном создании пожертвований должен возвращаться статус-код 200.'
+    )
+    data = response.json()
+    assert [donation['id'] for donation in data] == [1, 2, 3], (
+        'При пакетном создании пожертвований ответ должен содержать результат для каждого пожертвования.'
+    )
+    assert [donation['invested_amount'] for donation in data] == [400, 400, 200], (
+        'Пакет пожертвований должен распределяться по проектам в порядке поступления.'
+    )
+    assert [donation['fully_invested'] for donation in data] == [True, True, False], (
+        'Пакет пожертвований должен распределяться по проектам в порядке поступления.'
+    )
+    assert data[0]['comment'] == 'first', (
+        'При пакетном создании пожертвований тело ответа API отличается от ожидаемого.'
+    )
+    assert charity_project.fully_invested, (
+        'Пакет пожертвований должен распределяться по проектам в порядке поступления.'
+    )
+    response = superuser_client.get('/donation/')
+    assert [donation['invested_amount'] for donation in response.json()] == [400, 400, 200], (
+        'Пожертвования из пакета должны сохраняться в БД.'
+    )
+
+
+@pytest.mark.parametrize('json', [
+    [],
+    [{'full_amount': -1}],
+    {'full_amount': 10},
+])
+def test_create_donations_bulk_incorrect(superuser_client, json):
+    response = superuser_client.post('/donation/bulk', json=json)
+    assert response.status_code == 422, (
+        'При некорректном теле POST-запроса к эндпоинту `/donation/bulk` '
+        'должен вернуться статус-код 422.'
+    )
+
+
+def test_create_donations_bulk_user(user_client):
+    response = user_client.post('/donation/bulk', json=[{'full_amount': 10}])
+    assert response.status_code == 401, (
+        'Пакетное создание пожертвований доступно только суперпользователю.'
+    )
+
+
+def test_get_all_donations_keyset_pages(superuser_client, donation, another_donation):
+    response = superuser_client.get('/donation/', params={'limit': 1})
+    assert [donation['id'] for donation in response.json()] == [1], (
+        'Страница должна содержать не больше `limit` пожертвований в порядке создания.'
+    )
+    response = superuser_client.get(
+        '/donation/', params={'limit': 1, 'cursor': response.headers['X-Next-Cursor']}
+    )
+    assert [donation['id'] for donation in response.json()] == [2], (
+        'Следующая страница должна начинаться после последнего пожертвования предыдущей.'
+    )
+
+
+def test_get_user_donation_sparse_fields(user_client, donation):
+    response = user_client.get('/donation/my', params={'fields': 'full_amount'})
+    assert response.json() == [{'full_amount': 100}], (
+        'Параметр `fields` должен ограничивать поля пожертвований в ответе.'
+    )
+    response = user_client.get('/donation/my', params={'fields': 'invested_amount'})
+    assert response.status_code == 422, (
+        'Поля, скрытые от пользователя, нельзя запросить через `fields`.'
+    )
+
+
+def test_get_user_donation_summary(user_client, charity_project, donation):
+    user_client.post('/donation/', json={'full_amount': 50})
+    response = user_client.get('/donation/my/summary')
+    assert response.status_code == 200, (
+        'При запросе итогов пожертвований пользователя должен возвращаться статус 200.'
+    )
+    assert response.json() == {
+        'donated_amount': 150,
+        'invested_amount': 50,
+        'open_amount': 100,
+        'donations_count': 2,
+    }, (
+        'Итоги пожертвований должны учитывать все пожертвования пользователя '
+        'и их распределение по проектам.'
+    )
+
+
+def test_get_user_donation_summary_empty(user_client):
+    response = user_client.get('/donation/my/summary')
+    assert response.json() == {
+        'donated_amount': 0,
+        'invested_amount': 0,
+        'open_amount': 0,
+        'donations_count': 0,
+    }, (
+        'Для пользователя без пожертвований итоги должны быть нулевыми.'
+    )
+
+
+def test_get_user_donations_skips_writer(auth_client):
+    """Аутентифицированные запросы на чтение не должны занимать подключения основной базы."""
+    auth_client.post('/donation/', json={'full_amount': 10})
+    connections = []
+
+    def count_connection(connection, *args):
+        connections.append(connection)
+
+    event.listen(engine.sync_engine, 'engine_connect', count_connection)
+    try:
+        response = auth_client.get('/donation/my')
+    finally:
+        event.remove(engine.sync_engine, 'engine_connect', count_connection)
+    assert response.status_code == 200, test_get_user_donations_skips_writer.__doc__
+    assert [donation['full_amount'] for donation in response.json()] == [10], (
+        test_get_user_donations_skips_writer.__doc__
+    )
+    assert connections == [], test_get_user_donations_skips_writer.__doc__
+
+
+def test_create_donation_releases_auth_connection(monkeypatch, auth_client):
+    """Подключение, через которое найден пользователь, должно возвращаться до создания пожертвования."""
+    connections = []
+    open_connections = []
+    create_donation = donation_endpoints.execute_create_investment_process
+
+    def count_checkout(*args):
+        connections.append(1)
+
+    def count_checkin(*args):
+        connections.append(-1)
+
+    async def create_and_count(*args, **kwargs):
+        open_connections.append(sum(connections))
+        return await create_donation(*args, **kwargs)
+
+    monkeypatch.setattr(donation_endpoints, 'execute_create_investment_process', create_and_count)
+    event.listen(read_engine.sync_engine, 'checkout', count_checkout)
+    event.listen(read_engine.sync_engine, 'checkin', count_checkin)
+    try:
+        response = auth_client.post('/donation/', json={'full_amount': 10})
+    finally:
+        event.remove(read_engine.sync_engine, 'checkout', count_checkout)
+        event.remove(read_engine.sync_engine, 'checkin', count_checkin)
+    assert response.status_code == 200, test_create_donation_releases_auth_connection.__doc__
+    assert connections, test_create_donation_releases_auth_connection.__doc__
+    assert open_connections == [0], test_create_donation_releases_auth_connection.__doc__
@@ -0,0 +1,93 @@
+import csv
+import io
+import threading
+import time
+
+import pytest
+from conftest import TestingSessionLocal
+from openpyxl import load_workbook
+
+from app.schemas.export import ExportFormat
+from app.services.export import EXPORT_WRITERS, XlsxWriter, exporter
+
+
+@pytest.fixture
+def export_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(exporter, 'session_factory', TestingSessionLocal)
+    monkeypatch.setattr(exporter, 'directory', tmp_path)
+    return tmp_path
+
+
+def wait_for_export(client, export_id):
+    for _ in range(100):
+        export = client.get(f'/export/{export_id}').json()
+        if export['status'] != 'running':
+            return export
+        time.sleep(0.01)
+    return export
+
+
+def test_export_donations_csv(superuser_client, export_dir, donation, another_donation):
+    response = superuser_client.post('/export/', json={'model': 'donation', 'format': 'csv'})
+    assert response.status_code == 202, (
+        'Выгрузка должна запускаться в фоне с ответом 202.'
+    )
+    export = wait_for_export(superuser_client, response.json()['id'])
+    assert export['status'] == 'done', (
+        'Выгрузка должна завершиться со статусом `done`.'
+    )
+    response = superuser_client.get(f'/export/{export["id"]}/file')
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(row['id'], row['user_id'], row['full_amount']) for row in rows] == [
+        ('1', '2', '100'), ('2', '1', '2000')
+    ], 'В CSV-файл должны попасть все пожертвования.'
+
+
+def test_export_charity_projects_xlsx(superuser_client, export_dir, charity_project, charity_project_nunchaku):
+    response = superuser_client.post('/export/', json={'model': 'charity_project', 'format': 'xlsx'})
+    export = wait_for_export(superuser_client, response.json()['id'])
+    assert export['status'] == 'done', (
+        'Выгрузка должна завершиться со статусом `done`.'
+    )
+    response = superuser_client.get(f'/export/{export["id"]}/file')
+    worksheet = load_workbook(io.BytesIO(response.content)).active
+    rows = [row[:4] for row in worksheet.iter_rows(values_only=True)]
+    assert rows == [
+        ('id', 'name', 'description', 'full_amount'),
+        (1, 'chimichangas4life', 'Huge fan of chimichangas. Wanna buy a lot', 1000000),
+        (2, 'nunchaku', 'Nunchaku is better', 5000000),
+    ], 'В XLSX-файл должны попасть все проекты.'
+
+
+def test_export_writes_outside_event_loop(monkeypatch, superuser_client, export_dir, charity_project):
+    threads = []
+
+    class RecordingXlsxWriter(XlsxWriter):
+
+        def write(self, rows):
+            threads.append(threading.current_thread())
+            super().write(rows)
+
+    monkeypatch.setitem(EXPORT_WRITERS, ExportFormat.xlsx, RecordingXlsxWriter)
+    response = superuser_client.post('/export/', json={'model': 'charity_project', 'format': 'xlsx'})
+    export = wait_for_export(superuser_client, response.json()['id'])
+    assert export['status'] == 'done', (
+        'Выгрузка должна завершиться со статусом `done`.'
+    )
+    assert threads and all(thread.name.startswith('export') for thread in threads), (
+        'Строки выгрузки должны записываться в отдельном потоке, а не в цикле событий.'
+    )
+
+
+def test_export_not_found(superuser_client, export_dir):
+    response = superuser_client.get('/export/00000000000000000000000000000000/file')
+    assert response.status_code == 422, (
+        'При запросе несуществующей выгрузки должна возвращаться ошибка 422.'
+    )
+
+
+def test_export_usual_user(user_client, export_dir):
+    response = user_client.post('/export/', json={'model': 'donation'})
+    assert response.status_code == 401, (
+        'Выгрузка доступна только суперпользователю.'
+    )
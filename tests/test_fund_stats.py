@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from conftest import TestingSessionLocal
+from sqlalchemy import update
+
+from app.models import FundStats
+from app.services.fund_stats import rebuild_fund_stats
+
+
+def closed_project(mixer):
+    return mixer.blend(
+        'app.models.charity_project.CharityProject',
+        name='Закрытый проект',
+        full_amount=300,
+        invested_amount=300,
+        fully_invested=True,
+        create_date=datetime(2010, 1, 1, 10),
+        close_date=datetime(2010, 1, 1, 11),
+    )
+
+
+def test_get_fund_stats(superuser_client, charity_project, donation, mixer):
+    closed_project(mixer)
+    mixer.blend(
+        'app.models.donation.Donation',
+        full_amount=50,
+        invested_amount=50,
+        fully_invested=True,
+        create_date=datetime(2010, 1, 1, 11),
+        close_date=datetime(2010, 1, 1, 11),
+    )
+    response = superuser_client.get('/stats/')
+    assert response.status_code == 200, (
+        'При запросе статистики фонда суперпользователем должен возвращаться статус 200.'
+    )
+    assert response.json() == {
+        'donated_amount': 150,
+        'invested_amount': 50,
+        'open_donations_amount': 100,
+        'open_projects_amount': 1000000,
+        'open_projects': 1,
+        'closed_projects': 1,
+        'average_close_seconds': 3600.0,
+    }, (
+        'Статистика фонда должна учитывать все проекты и пожертвования.'
+    )
+
+
+def test_get_fund_stats_user(user_client):
+    response = user_client.get('/stats/')
+    assert response.status_code == 401, (
+        'Статистика фонда должна быть доступна только суперпользователю.'
+    )
+
+
+async def test_rebuild_fund_stats(mixer):
+    closed_project(mixer)
+    async with TestingSessionLocal() as session:
+        await session.execute(update(FundStats).values(closed_projects=0))
+        await session.commit()
+    async with TestingSessionLocal() as session:
+        assert await rebuild_fund_stats(session, dry_run=True) == {
+            'closed_projects': (0, 1),
+        }, 'Пересчет должен сообщать о расхождениях статистики.'
+    async with TestingSessionLocal() as session:
+        await rebuild_fund_stats(session)
+    async with TestingSessionLocal() as session:
+        assert await rebuild_fund_stats(session) == {}, (
+            'После пересчета статистика должна совпадать с данными.'
+        )
+
+
+def test_get_funding_gap(test_client, charity_project, donation):
+    response = test_client.get('/stats/funding-gap')
+    assert response.status_code == 200, (
+        'Разрыв финансирования должен быть доступен всем пользователям.'
+    )
+    assert response.json() == {
+        'open_projects_amount': 1000000,
+        'open_donations_amount': 100,
+    }, (
+        'Разрыв финансирования должен показывать нужды открытых проектов '
+        'и сумму нераспределенных пожертвований.'
+    )
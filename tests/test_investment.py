@@ -1,4 +1,25 @@
+import asyncio
+import sqlite3
+from datetime import datetime
+
 import pytest
+from conftest import TEST_DB, TestingSessionLocal, engine
+from sqlalchemy import event, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql.expression import false
+
+from app.core.config import settings
+from app.models import CharityProject, Donation, Investment
+from app.crud.charity_project import charityproject_crud
+from app.crud.donation import donation_crud
+from app.schemas.charity_project import CharityProjectCreate
+from app.schemas.donation import DonationCreate
+from app.services.allocation_worker import AllocationWorker
+from app.services.deferred_worker import DeferredAllocationWorker
+from app.services.investment import (INVESTMENT_ENGINES,
+                                     execute_investment_process,
+                                     get_not_invested_objects, invest_with_orm)
+from app.services.open_pool import open_pool
 
 
 def test_donation_exist_non_project(superuser_client, donation):
@@ -45,3 +66,498 @@ def test_donation_to_little_invest_project(user_client, charity_project_little_i
     assert charity_project_little_invested.invested_amount == 1000, test_donation_to_little_invest_project.__doc__
     assert not charity_project_nunchaku.fully_invested, test_donation_to_little_invest_project.__doc__
     assert charity_project_nunchaku.invested_amount == 0, test_donation_to_little_invest_project.__doc__
+
+
+async def test_not_invested_objects_keyset_chunks(mixer):
+    """Открытые проекты должны выбираться порциями в порядке (create_date, id), закрытые проекты пропускаются."""
+    for day, fully_invested in ((3, False), (1, False), (2, True), (1, False), (4, False)):
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            full_amount=100,
+            fully_invested=fully_invested,
+            create_date=datetime(2010, 10, day),
+        )
+    async with TestingSessionLocal() as session:
+        projects = [
+            project.id async for project in get_not_invested_objects(
+                CharityProject, session, chunk_size=2
+            )
+        ]
+    assert projects == [2, 4, 1, 5], test_not_invested_objects_keyset_chunks.__doc__
+
+
+@pytest.mark.parametrize('engine', ['orm', 'sql', 'pool'])
+def test_investment_engines_donation(monkeypatch, engine, user_client, charity_project_little_invested, charity_project_nunchaku):
+    """Пожертвование закрывает первый проект, а остаток уходит во второй проект при любом способе распределения."""
+    monkeypatch.setattr(settings, 'investment_engine', engine)
+    monkeypatch.setattr(open_pool, 'version', None)
+    response = user_client.post('/donation/', json={
+        'full_amount': 1000000,
+    })
+    assert response.status_code == 200, test_investment_engines_donation.__doc__
+    assert charity_project_little_invested.fully_invested, test_investment_engines_donation.__doc__
+    assert charity_project_little_invested.invested_amount == 1000000, test_investment_engines_donation.__doc__
+    assert charity_project_little_invested.close_date is not None, test_investment_engines_donation.__doc__
+    assert not charity_project_nunchaku.fully_invested, test_investment_engines_donation.__doc__
+    assert charity_project_nunchaku.invested_amount == 100, test_investment_engines_donation.__doc__
+
+
+@pytest.mark.parametrize('engine', ['orm', 'sql', 'pool'])
+def test_investment_engines_project(monkeypatch, engine, superuser_client, donation, another_donation):
+    """Новый проект забирает пожертвования в порядке их создания при любом способе распределения."""
+    monkeypatch.setattr(settings, 'investment_engine', engine)
+    monkeypatch.setattr(open_pool, 'version', None)
+    response = superuser_client.post('/charity_project/', json={
+        'name': 'Мертвый Бассейн',
+        'description': 'Deadpool inside',
+        'full_amount': 1000,
+    })
+    data = response.json()
+    assert data['invested_amount'] == 1000, test_investment_engines_project.__doc__
+    assert data['fully_invested'], test_investment_engines_project.__doc__
+    assert 'close_date' in data, test_investment_engines_project.__doc__
+    assert donation.fully_invested, test_investment_engines_project.__doc__
+    assert donation.invested_amount == 100, test_investment_engines_project.__doc__
+    assert not another_donation.fully_invested, test_investment_engines_project.__doc__
+    assert another_donation.invested_amount == 900, test_investment_engines_project.__doc__
+
+
+def test_open_pool_resync(monkeypatch, mixer, user_client):
+    """Пул открытых объектов должен перестраиваться, если в базу записали данные в обход него."""
+    monkeypatch.setattr(settings, 'investment_engine', 'pool')
+    monkeypatch.setattr(open_pool, 'version', None)
+    user_client.post('/donation/', json={'full_amount': 100})
+    charity_project = mixer.blend(
+        'app.models.charity_project.CharityProject',
+        full_amount=1000,
+        create_date=datetime.now(),
+    )
+    user_client.post('/donation/', json={'full_amount': 300})
+    assert charity_project.invested_amount == 300, test_open_pool_resync.__doc__
+    assert [entry.remaining for entry in open_pool.entries[CharityProject].values()] == [700], (
+        test_open_pool_resync.__doc__
+    )
+    assert [entry.remaining for entry in open_pool.entries[Donation].values()] == [100], (
+        test_open_pool_resync.__doc__
+    )
+
+
+async def test_allocation_worker_batch(monkeypatch, mixer):
+    """Одновременные пожертвования должны распределяться одним пакетом в порядке поступления."""
+    charity_project = mixer.blend(
+        'app.models.charity_project.CharityProject',
+        full_amount=1000,
+        create_date=datetime.now(),
+    )
+    worker = AllocationWorker(TestingSessionLocal, batch_size=10, batch_timeout=0.05)
+    batches = []
+    process = worker.process
+
+    async def process_and_count(batch):
+        batches.append(len(batch))
+        await process(batch)
+
+    monkeypatch.setattr(worker, 'process', process_and_count)
+    await worker.start()
+    donations = await asyncio.gather(*(
+        worker.submit(Donation(full_amount=400, user_id=2)) for _ in range(3)
+    ))
+    await worker.stop()
+    assert batches == [3], test_allocation_worker_batch.__doc__
+    assert [donation.invested_amount for donation in donations] == [400, 400, 200], (
+        test_allocation_worker_batch.__doc__
+    )
+    assert [donation.fully_invested for donation in donations] == [True, True, False], (
+        test_allocation_worker_batch.__doc__
+    )
+    assert charity_project.fully_invested, test_allocation_worker_batch.__doc__
+
+
+async def test_allocation_worker_stop_resolves_queued(mixer):
+    """При остановке обработчик должен распределить пожертвования из очереди, а новые — отклонять."""
+    worker = AllocationWorker(TestingSessionLocal, batch_size=2, batch_timeout=0.05)
+    await worker.start()
+    queued = [
+        asyncio.create_task(worker.submit(Donation(full_amount=100, user_id=2)))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    await worker.stop()
+    donations = await asyncio.wait_for(asyncio.gather(*queued), 1)
+    assert all(donation.id for donation in donations), test_allocation_worker_stop_resolves_queued.__doc__
+    with pytest.raises(RuntimeError):
+        await worker.submit(Donation(full_amount=100, user_id=2))
+
+
+async def test_allocation_worker_stop_rejects_queued_after_failure():
+    """Если обработчик упал, ожидающие в очереди запросы должны получить ошибку при остановке."""
+    worker = AllocationWorker(TestingSessionLocal)
+    await worker.start()
+    worker.task.cancel()
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(worker.submit(Donation(full_amount=100, user_id=2)))
+    await asyncio.sleep(0)
+    await worker.stop()
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(queued, 1)
+
+
+def test_deferred_allocation_accepted(monkeypatch, user_client, charity_project):
+    """В отложенном режиме пожертвование только сохраняется, а статус показывает, что распределение ещё не выполнено."""
+    monkeypatch.setattr(settings, 'allocation_mode', 'deferred')
+    response = user_client.post('/donation/', json={'full_amount': 100})
+    assert response.status_code == 202, test_deferred_allocation_accepted.__doc__
+    assert response.json()['full_amount'] == 100, test_deferred_allocation_accepted.__doc__
+    response = user_client.get(f'/donation/{response.json()["id"]}/status')
+    assert response.json() == {
+        'id': 1, 'allocated': False, 'invested_amount': 0, 'fully_invested': False,
+    }, test_deferred_allocation_accepted.__doc__
+    assert charity_project.invested_amount == 0, test_deferred_allocation_accepted.__doc__
+
+
+async def test_deferred_worker_allocates_pending(mixer):
+    """Фоновый обработчик должен распределять отложенные объекты в порядке их создания."""
+    charity_project = mixer.blend(
+        'app.models.charity_project.CharityProject',
+        full_amount=1000,
+        create_date=datetime(2020, 1, 1),
+    )
+    worker = DeferredAllocationWorker(TestingSessionLocal)
+    async with TestingSessionLocal() as session:
+        donation = await worker.defer(
+            DonationCreate(full_amount=1500), donation_crud, session
+        )
+        pending_project = await worker.defer(
+            CharityProjectCreate(name='Мертвый Бассейн', description='Deadpool inside', full_amount=700),
+            charityproject_crud,
+            session
+        )
+    assert await worker.allocate_pending() == 2, test_deferred_worker_allocates_pending.__doc__
+    async with TestingSessionLocal() as session:
+        donation = await session.get(Donation, donation.id)
+        pending_project = await session.get(CharityProject, pending_project.id)
+        charity_project = await session.get(CharityProject, charity_project.id)
+    assert donation.allocated and donation.fully_invested, test_deferred_worker_allocates_pending.__doc__
+    assert charity_project.fully_invested, test_deferred_worker_allocates_pending.__doc__
+    assert pending_project.allocated, test_deferred_worker_allocates_pending.__doc__
+    assert pending_project.invested_amount == 500, test_deferred_worker_allocates_pending.__doc__
+    assert not pending_project.fully_invested, test_deferred_worker_allocates_pending.__doc__
+
+
+@pytest.mark.parametrize('investment_engine', ['orm', 'sql', 'pool'])
+async def test_deferred_worker_skips_pending_counterparts(monkeypatch, investment_engine, mixer):
+    """Ожидающий распределения объект не должен получать средства раньше своей очереди."""
+    monkeypatch.setattr(settings, 'investment_engine', investment_engine)
+    monkeypatch.setattr(open_pool, 'version', None)
+    charity_project = mixer.blend(
+        'app.models.charity_project.CharityProject',
+        full_amount=100,
+        create_date=datetime(2020, 1, 1),
+    )
+    worker = DeferredAllocationWorker(TestingSessionLocal)
+    async with TestingSessionLocal() as session:
+        pending_project = await worker.defer(
+            CharityProjectCreate(name='Мертвый Бассейн', description='Deadpool inside', full_amount=100),
+            charityproject_crud,
+            session
+        )
+        donation = await worker.defer(
+            DonationCreate(full_amount=100), donation_crud, session
+        )
+    assert await worker.allocate_pending() == 2, test_deferred_worker_skips_pending_counterparts.__doc__
+    async with TestingSessionLocal() as session:
+        donation = await session.get(Donation, donation.id)
+        pending_project = await session.get(CharityProject, pending_project.id)
+        charity_project = await session.get(CharityProject, charity_project.id)
+    assert donation.fully_invested, test_deferred_worker_skips_pending_counterparts.__doc__
+    assert charity_project.fully_invested, test_deferred_worker_skips_pending_counterparts.__doc__
+    assert pending_project.invested_amount == 0, test_deferred_worker_skips_pending_counterparts.__doc__
+
+
+async def test_deferred_worker_survives_errors(monkeypatch, mixer):
+    """Ошибка одного прохода не должна останавливать фоновое распределение."""
+    charity_project = mixer.blend(
+        'app.models.charity_project.CharityProject',
+        full_amount=1000,
+        create_date=datetime(2020, 1, 1),
+    )
+    worker = DeferredAllocationWorker(TestingSessionLocal, poll_interval=0.01)
+    async with TestingSessionLocal() as session:
+        donation = await worker.defer(DonationCreate(full_amount=300), donation_crud, session)
+    allocate_pending = worker.allocate_pending
+    passes = []
+
+    async def fail_once():
+        if not passes:
+            passes.append(0)
+            raise OperationalError('SELECT 1', {}, Exception('disk I/O error'))
+        passes.append(await allocate_pending())
+
+    monkeypatch.setattr(worker, 'allocate_pending', fail_once)
+    await worker.start()
+    for _ in range(100):
+        if len(passes) > 1:
+            break
+        await asyncio.sleep(0.01)
+    assert not worker.task.done(), test_deferred_worker_survives_errors.__doc__
+    await worker.stop()
+    async with TestingSessionLocal() as session:
+        donation = await session.get(Donation, donation.id)
+        charity_project = await session.get(CharityProject, charity_project.id)
+    assert passes[:2] == [0, 1], test_deferred_worker_survives_errors.__doc__
+    assert donation.allocated and donation.fully_invested, test_deferred_worker_survives_errors.__doc__
+    assert charity_project.invested_amount == 300, test_deferred_worker_survives_errors.__doc__
+
+
+async def test_investment_retry_on_conflict(monkeypatch, mixer):
+    """Если проект изменили параллельно, распределение должно повториться с актуальными данными."""
+    mixer.blend(
+        'app.models.charity_project.CharityProject',
+        full_amount=1000,
+        create_date=datetime.now(),
+    )
+    conflicts = []
+
+    async def invest_with_conflict(object_in, session):
+        if not conflicts:
+            charity_project = await session.get(CharityProject, 1)
+            conflicts.append(charity_project.full_amount)
+            async with engine.begin() as connection:
+                await connection.execute(
+                    CharityProject.__table__.update().values(
+                        full_amount=500, version=CharityProject.version + 1
+                    )
+                )
+        return await invest_with_orm(object_in, session)
+
+    monkeypatch.setattr(settings, 'investment_engine', 'orm')
+    monkeypatch.setitem(INVESTMENT_ENGINES, 'orm', invest_with_conflict)
+    async with TestingSessionLocal() as session:
+        donation = Donation(full_amount=700, user_id=2)
+        session.add(donation)
+        await session.commit()
+        await session.refresh(donation)
+        await execute_investment_process(donation, session)
+        await session.refresh(donation)
+        charity_project = await session.get(CharityProject, 1)
+    assert conflicts == [1000], test_investment_retry_on_conflict.__doc__
+    assert donation.invested_amount == 500, test_investment_retry_on_conflict.__doc__
+    assert not donation.fully_invested, test_investment_retry_on_conflict.__doc__
+    assert charity_project.invested_amount == 500, test_investment_retry_on_conflict.__doc__
+    assert charity_project.fully_invested, test_investment_retry_on_conflict.__doc__
+
+
+async def test_investment_retry_on_locked_database(monkeypatch, mixer):
+    """Если базу заблокировал другой процесс, распределение должно повториться, а не завершиться ошибкой."""
+    mixer.blend(
+        'app.models.charity_project.CharityProject',
+        full_amount=1000,
+        create_date=datetime.now(),
+    )
+    locks = []
+
+    async def invest_with_lock(object_in, session):
+        if locks:
+            return await invest_with_orm(object_in, session)
+        await session.execute(text('PRAGMA busy_timeout = 0'))
+        writer = sqlite3.connect(TEST_DB, isolation_level=None)
+        writer.execute('BEGIN IMMEDIATE')
+        try:
+            await invest_with_orm(object_in, session)
+            await session.flush()
+        except OperationalError as error:
+            locks.append(str(error.orig))
+            raise
+        finally:
+            writer.execute('ROLLBACK')
+            writer.close()
+
+    monkeypatch.setattr(settings, 'investment_engine', 'orm')
+    monkeypatch.setitem(INVESTMENT_ENGINES, 'orm', invest_with_lock)
+    async with TestingSessionLocal() as session:
+        donation = Donation(full_amount=700, user_id=2)
+        session.add(donation)
+        await session.commit()
+        await session.refresh(donation)
+        await execute_investment_process(donation, session)
+        await session.refresh(donation)
+    assert locks == ['database is locked'], test_investment_retry_on_locked_database.__doc__
+    assert donation.invested_amount == 700, test_investment_retry_on_locked_database.__doc__
+    assert donation.fully_invested, test_investment_retry_on_locked_database.__doc__
+
+
+@pytest.mark.parametrize('engine', ['orm', 'sql', 'pool'])
+def test_investment_ledger_donation(monkeypatch, engine, user_client, charity_project_little_invested, charity_project_nunchaku):
+    """Каждое распределение пожертвования должно записываться в журнал инвестиций."""
+    monkeypatch.setattr(settings, 'investment_engine', engine)
+    monkeypatch.setattr(open_pool, 'version', None)
+    user_client.post('/donation/', json={'full_amount': 1000000})
+    response = user_client.get('/donation/1/investments')
+    assert response.status_code == 200, test_investment_ledger_donation.__doc__
+    assert [
+        (investment['donation_id'], investment['project_id'], investment['amount'])
+        for investment in response.json()
+    ] == [(1, 1, 999900), (1, 2, 100)], test_investment_ledger_donation.__doc__
+
+
+@pytest.mark.parametrize('engine', ['orm', 'sql', 'pool'])
+def test_investment_ledger_project(monkeypatch, engine, superuser_client, donation, another_donation):
+    """Журнал инвестиций должен показывать, какие пожертвования профинансировали проект."""
+    monkeypatch.setattr(settings, 'investment_engine', engine)
+    monkeypatch.setattr(open_pool, 'version', None)
+    superuser_client.post('/charity_project/', json={
+        'name': 'Мертвый Бассейн',
+        'description': 'Deadpool inside',
+        'full_amount': 1000,
+    })
+    response = superuser_client.get('/charity_project/1/investments')
+    assert response.status_code == 200, test_investment_ledger_project.__doc__
+    assert [
+        (investment['donation_id'], investment['project_id'], investment['amount'])
+        for investment in response.json()
+    ] == [(1, 1, 100), (2, 1, 900)], test_investment_ledger_project.__doc__
+
+
+@pytest.mark.parametrize('investment_engine', ['orm', 'sql', 'pool'])
+def test_create_and_invest_single_commit(monkeypatch, investment_engine, superuser_client, charity_project, donation):
+    """Создание объекта и распределение средств должны завершаться одним коммитом без повторного чтения объекта."""
+    monkeypatch.setattr(settings, 'investment_engine', investment_engine)
+    monkeypatch.setattr(open_pool, 'version', None)
+    commits = []
+    statements = []
+
+    def count_commit(connection):
+        commits.append(connection)
+
+    def count_statement(connection, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, 'commit', count_commit)
+    event.listen(engine.sync_engine, 'before_cursor_execute', count_statement)
+    try:
+        response = superuser_client.post('/charity_project/', json={
+            'name': 'Мертвый Бассейн',
+            'description': 'Deadpool inside',
+            'full_amount': 50,
+        })
+    finally:
+        event.remove(engine.sync_engine, 'commit', count_commit)
+        event.remove(engine.sync_engine, 'before_cursor_execute', count_statement)
+    data = response.json()
+    assert response.status_code == 200, test_create_and_invest_single_commit.__doc__
+    assert data['invested_amount'] == 50, test_create_and_invest_single_commit.__doc__
+    assert data['fully_invested'], test_create_and_invest_single_commit.__doc__
+    assert len(commits) == 1, test_create_and_invest_single_commit.__doc__
+    assert not any(
+        statement.startswith('SELECT') and 'WHERE charityproject.id = ?' in statement
+        for statement in statements
+    ), test_create_and_invest_single_commit.__doc__
+
+
+def test_investment_ledger_foreign_donation(user_client, another_donation):
+    response = user_client.get('/donation/1/investments')
+    assert response.status_code == 422, (
+        'Пользователь не может смотреть распределение чужих пожертвований.'
+    )
+
+
+async def test_replay_investments(mixer):
+    """Пересчёт должен заново распределить все пожертвования по проектам в порядке создания."""
+    pytest.importorskip('numpy')
+    from app.services.replay import replay_investments
+
+    for model, full_amount, day in (
+        ('charity_project.CharityProject', 1000, 1),
+        ('donation.Donation', 600, 2),
+        ('donation.Donation', 600, 3),
+        ('charity_project.CharityProject', 500, 4),
+    ):
+        mixer.blend(
+            f'app.models.{model}',
+            full_amount=full_amount,
+            create_date=datetime(2020, 1, day),
+        )
+    async with TestingSessionLocal() as session:
+        report = await replay_investments(session)
+    async with TestingSessionLocal() as session:
+        projects = (await session.execute(
+            select(CharityProject).order_by(CharityProject.id)
+        )).scalars().all()
+        donations = (await session.execute(
+            select(Donation).order_by(Donation.id)
+        )).scalars().all()
+        investments = (await session.execute(
+            select(Investment).order_by(Investment.id)
+        )).scalars().all()
+    assert report == {'donations': 2, 'projects': 2, 'investments': 3}, test_replay_investments.__doc__
+    assert [
+        (project.invested_amount, project.fully_invested, project.close_date) for project in projects
+    ] == [(1000, True, datetime(2020, 1, 3)), (200, False, None)], test_replay_investments.__doc__
+    assert [
+        (donation.invested_amount, donation.fully_invested, donation.close_date) for donation in donations
+    ] == [(600, True, datetime(2020, 1, 2)), (600, True, datetime(2020, 1, 4))], test_replay_investments.__doc__
+    assert [
+        (investment.donation_id, investment.project_id, investment.amount) for investment in investments
+    ] == [(1, 1, 600), (2, 1, 400), (2, 2, 200)], test_replay_investments.__doc__
+
+
+@pytest.mark.parametrize('query, index', [
+    (
+        select(CharityProject.id, CharityProject.remaining_amount).where(
+            CharityProject.fully_invested == false()
+        ).order_by(CharityProject.create_date, CharityProject.id),
+        'ix_charityproject_open',
+    ),
+    (
+        select(Donation).where(
+            Donation.fully_invested == false()
+        ).order_by(Donation.create_date, Donation.id).limit(100),
+        'ix_donation_open',
+    ),
+    (
+        donation_crud.select_page(100, (datetime(2020, 1, 1), 1)).where(Donation.user_id == 1),
+        'ix_donation_user_id_create_date',
+    ),
+    (
+        charityproject_crud.select_page(100, (datetime(2020, 1, 1), 1)),
+        'ix_charityproject_create_date',
+    ),
+    (
+        charityproject_crud.select_page(100, fully_invested=False),
+        'ix_charityproject_open',
+    ),
+])
+async def test_allocation_queries_use_indexes(query, index):
+    """Выборки открытых объектов и пожертвований пользователя должны идти по индексам, без полного сканирования таблиц."""
+    statement = query.compile(engine.sync_engine, compile_kwargs={'literal_binds': True})
+    async with engine.connect() as connection:
+        plan = await connection.execute(text(f'EXPLAIN QUERY PLAN {statement}'))
+        details = [row[3] for row in plan]
+    assert any(f'USING INDEX {index}' in detail for detail in details), test_allocation_queries_use_indexes.__doc__
+    assert not any('TEMP B-TREE' in detail for detail in details), test_allocation_queries_use_indexes.__doc__
+
+
+@pytest.mark.parametrize('investment_engine', ['orm', 'sql', 'pool'])
+def test_create_without_counterparts_skips_allocation(monkeypatch, investment_engine, user_client, mixer):
+    """Если открытых проектов нет, пожертвование не должно искать проекты для распределения."""
+    monkeypatch.setattr(settings, 'investment_engine', investment_engine)
+    mixer.blend(
+        'app.models.charity_project.CharityProject',
+        full_amount=1000,
+        invested_amount=1000,
+        fully_invested=True,
+    )
+    statements = []
+
+    def count_statement(connection, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', count_statement)
+    try:
+        response = user_client.post('/donation/', json={'full_amount': 100})
+    finally:
+        event.remove(engine.sync_engine, 'before_cursor_execute', count_statement)
+    assert response.status_code == 200, test_create_without_counterparts_skips_allocation.__doc__
+    assert not any(
+        'FROM charityproject' in statement for statement in statements
+    ), test_create_without_counterparts_skips_allocation.__doc__